@@ -1,5 +1,3 @@
-from random import randint
-
 from domain.infrastructure.geometry import Direction, Point
 
 from domain.enemy import Enemy, EnemyType
@@ -26,8 +24,7 @@ class EnemyAI:
         elif dy > 0:
             enemy.rotate(Direction.Up)
 
-    @staticmethod
-    def _generate_direction(direction):
+    def _generate_direction(self, direction):
         directions = [
             Direction.Up,
             Direction.Down,
@@ -35,7 +32,7 @@ class EnemyAI:
             Direction.Right
         ]
         directions.remove(direction)
-        index = randint(0, 2)
+        index = self.game.random.randint(0, 2)
         return directions[index]
 
     @staticmethod
@@ -46,26 +43,27 @@ class EnemyAI:
         return True
 
     def dfs(self, enemy, start, directions, visited):
-        if Player in self.game.map.cell_types(start):
-            directions.pop()
-            return directions
-
         visited.add(start)
-        for nxt in start.neighbors():
-            location = nxt[0]
-            direction = nxt[1]
-
-            if location in visited or \
-                    not self.game.map.check_coords(location):
-                continue
-            if Wall in self.game.map.cell_types(location):
-                continue
-
-            directions.append(direction)
-            res = self.dfs(enemy, location, directions, visited)
-            if res:
-                return directions
+        frames = [iter(start.neighbors())]
+        while frames:
+            for location, direction in frames[-1]:
+                if location in visited or \
+                        not self.game.map.check_coords(location):
+                    continue
+                cell_types = self.game.map.cell_types(location)
+                if Wall in cell_types:
+                    continue
+                if Player in cell_types:
+                    if directions:
+                        return directions
+                    continue
+
+                directions.append(direction)
+                visited.add(location)
+                frames.append(iter(location.neighbors()))
+                break
             else:
+                frames.pop()
                 if len(directions) != 0:
                     directions.pop()
 
@@ -128,7 +126,7 @@ class EnemyAI:
         enemy.shoot_count += 1
         if enemy.shoot_count % 6 == 0:
             enemy.shoot_count = 0
-            if randint(0, 1):
+            if self.game.random.randint(0, 1):
                 new_direction = self._generate_direction(enemy.direction)
                 enemy.rotate(new_direction)
                 bullet = enemy.shoot()
@@ -0,0 +1,68 @@
+from functools import lru_cache
+import os
+
+
+SOUNDS = os.path.join(os.path.dirname(__file__), "sounds")
+
+# How many copies of a sound may play at once. Anything triggered
+# while all of them are busy is dropped.
+VOICES = {
+    "fire": 3,
+    "boom": 2,
+    "brick": 2
+}
+DEFAULT_VOICES = 1
+
+
+def sound_effect(path):
+    # Imported here so headless tools can use the bank's bookkeeping
+    # without a multimedia backend.
+    from PyQt5.QtMultimedia import QSoundEffect
+    from PyQt5.QtCore import QUrl
+
+    effect = QSoundEffect()
+    effect.setSource(QUrl.fromLocalFile(path))
+    return effect
+
+
+class AudioBank:
+    def __init__(self, directory=SOUNDS, voices=VOICES, create=sound_effect):
+        self.voices = dict()
+        self.pending = list()
+        self.played = 0
+        self.dropped = 0
+        for name in sorted(os.listdir(directory)):
+            stem, extension = os.path.splitext(name)
+            if extension == ".wav":
+                path = os.path.join(directory, name)
+                self.voices[stem] = [
+                    create(path)
+                    for _ in range(voices.get(stem, DEFAULT_VOICES))]
+
+    def __contains__(self, name):
+        return name in self.voices
+
+    def trigger(self, name):
+        # Identical triggers before the next flush play only once.
+        if name not in self.pending:
+            self.pending.append(name)
+
+    def flush(self):
+        for name in self.pending:
+            voice = next((voice for voice in self.voices[name]
+                          if not voice.isPlaying()), None)
+            if voice is None:
+                self.dropped += 1
+            else:
+                voice.play()
+                self.played += 1
+        self.pending.clear()
+
+    def play(self, name):
+        self.trigger(name)
+        self.flush()
+
+
+@lru_cache(maxsize=None)
+def load_bank(directory=SOUNDS):
+    return AudioBank(directory)
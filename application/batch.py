@@ -0,0 +1,121 @@
+from application.game import Game, GameStatus
+from application.level import create_level
+from application.level_cache import LevelCache
+from application.policy import POLICIES
+
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+import argparse
+import json
+import time
+import csv
+
+
+OUTCOMES = {
+    GameStatus.Win: "win",
+    GameStatus.End: "lose",
+    GameStatus.Process: "timeout"
+}
+
+FIELDS = ["seed", "policy", "outcome", "ticks",
+          "score", "kills", "seconds", "workers"]
+
+
+def run_game(seed, policy="hunter", size=13, max_ticks=360000,
+             level_cache=None):
+    started = time.perf_counter()
+    game = Game(size=size, seed=seed)
+    if level_cache:
+        game.start(LevelCache(level_cache).get(size, seed))
+    else:
+        game.start(create_level(size, seed))
+    player = POLICIES[policy](seed)
+
+    while (game.status == GameStatus.Process
+           and game.clock.ticks < max_ticks):
+        direction, fire = player(game)
+        game.step(direction, fire)
+
+    return {
+        "seed": seed,
+        "policy": policy,
+        "outcome": OUTCOMES[game.status],
+        "ticks": game.clock.ticks,
+        "score": game.score,
+        "kills": game.kills,
+        "seconds": round(time.perf_counter() - started, 6)
+    }
+
+
+def run_batch(seeds, policy="hunter", workers=1,
+              size=13, max_ticks=360000, level_cache=None):
+    job = partial(run_game, policy=policy, size=size,
+                  max_ticks=max_ticks, level_cache=level_cache)
+
+    started = time.perf_counter()
+    if workers == 1:
+        results = list(map(job, seeds))
+    else:
+        chunksize = max(1, len(seeds) // (workers * 4))
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(job, seeds, chunksize=chunksize))
+    elapsed = time.perf_counter() - started
+
+    for result in results:
+        result["workers"] = workers
+    return results, elapsed
+
+
+def write_results(results, path):
+    with open(path, "w", newline="") as file:
+        if path.endswith(".csv"):
+            writer = csv.DictWriter(file, fieldnames=FIELDS)
+            writer.writeheader()
+            writer.writerows(results)
+        else:
+            for result in results:
+                file.write(json.dumps(result) + "\n")
+
+
+def main():
+    args = create_parser().parse_args()
+    seeds = list(range(args.first, args.last + 1))
+
+    results = list()
+    for workers in args.workers:
+        batch, elapsed = run_batch(
+            seeds, args.policy, workers, args.size,
+            args.max_ticks, args.level_cache)
+        results.extend(batch)
+        print(f"workers={workers}: {len(batch)} games "
+              f"in {elapsed:.2f}s, {len(batch) / elapsed:.1f} games/sec")
+
+    if args.output:
+        write_results(results, args.output)
+
+
+def create_parser():
+    parser = argparse.ArgumentParser(
+        description="Run headless games for a range of level seeds")
+    parser.add_argument("first", type=int, help="First seed")
+    parser.add_argument("last", type=int, help="Last seed (inclusive)")
+    parser.add_argument(
+        "--policy", choices=sorted(POLICIES), default="hunter",
+        help="Player policy")
+    parser.add_argument(
+        "--workers", type=int, nargs="+", default=[1],
+        help="Worker process counts to measure")
+    parser.add_argument("--size", type=int, default=13)
+    parser.add_argument(
+        "--max-ticks", type=int, default=360000,
+        help="Stop a game as a timeout after this many ticks")
+    parser.add_argument(
+        "--output", help="Results file (.csv or .jsonl)")
+    parser.add_argument(
+        "--level-cache", metavar="DIR",
+        help="Load generated levels from this cache directory")
+    return parser
+
+
+if __name__ == "__main__":
+    main()
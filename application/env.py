@@ -0,0 +1,223 @@
+from application.game import Game, GameStatus
+from application.level import create_level
+
+from domain.infrastructure.geometry import Direction
+from domain.obstacle import Wall, WallType
+from domain.enemy import Enemy, EnemyType
+from domain.terrain import Grass
+from domain.player import Player
+from domain.bullet import Bullet
+from domain.bonus import Bonus
+from domain.flag import Flag
+
+from multiprocessing import Pipe, Process
+import random
+
+import numpy as np
+
+
+CHANNELS = [
+    "brick", "concrete", "grass", "flag", "player",
+    "patrolling", "haunting", "spawn",
+    "player_bullet", "enemy_bullet", "bonus"
+]
+
+ACTIONS = [
+    (None, False),
+    (Direction.Up, False),
+    (Direction.Down, False),
+    (Direction.Left, False),
+    (Direction.Right, False),
+    (None, True),
+    (Direction.Up, True),
+    (Direction.Down, True),
+    (Direction.Left, True),
+    (Direction.Right, True)
+]
+
+ENEMY_CHANNELS = {
+    EnemyType.Patrolling: CHANNELS.index("patrolling"),
+    EnemyType.Haunting: CHANNELS.index("haunting"),
+    EnemyType.SpawnPatrolling: CHANNELS.index("spawn"),
+    EnemyType.SpawnHaunting: CHANNELS.index("spawn")
+}
+
+REWARD_WIN = 10.0
+REWARD_LOSE = -10.0
+
+
+class BattleCityEnv:
+    def __init__(self, size=13, ticks_per_step=16, max_steps=2000):
+        self.size = size
+        self.ticks_per_step = ticks_per_step
+        self.max_steps = max_steps
+        self.observation_shape = (len(CHANNELS), size, size)
+        self.action_count = len(ACTIONS)
+        self.game = None
+        self.steps = 0
+        self._seeds = random.Random()
+
+    def reset(self, seed=None):
+        if seed is None:
+            seed = self._seeds.randrange(2 ** 31)
+        self.game = Game(size=self.size, seed=seed)
+        self.game.start(create_level(self.size, seed))
+        self.steps = 0
+        return self.observe(), {"seed": seed}
+
+    def step(self, action):
+        direction, fire = ACTIONS[action]
+        score = self.game.score
+        self.game.fast_forward(self.ticks_per_step, direction, fire)
+        self.steps += 1
+
+        reward = float(self.game.score - score)
+        terminated = self.game.status != GameStatus.Process
+        if self.game.status == GameStatus.Win:
+            reward += REWARD_WIN
+        elif self.game.status == GameStatus.End:
+            reward += REWARD_LOSE
+        truncated = not terminated and self.steps >= self.max_steps
+
+        info = {"score": self.game.score, "ticks": self.game.clock.ticks}
+        return self.observe(), reward, terminated, truncated, info
+
+    def observe(self, out=None):
+        if out is None:
+            out = np.zeros(self.observation_shape, dtype=np.uint8)
+        else:
+            out.fill(0)
+
+        game_map = self.game.map
+        for wall in game_map.get_objects(Wall):
+            channel = 0 if wall.wall_type == WallType.Brick else 1
+            out[channel, wall.location.y, wall.location.x] = 1
+        for grass in game_map.get_objects(Grass):
+            out[2, grass.location.y, grass.location.x] = 1
+        for flag in game_map.get_objects(Flag):
+            out[3, flag.location.y, flag.location.x] = 1
+        for player in game_map.get_objects(Player):
+            out[4, player.location.y, player.location.x] = 1
+        for enemy in game_map.get_objects(Enemy):
+            channel = ENEMY_CHANNELS[enemy.type]
+            out[channel, enemy.location.y, enemy.location.x] = 1
+        for bullet in game_map.get_objects(Bullet):
+            channel = 8 if isinstance(bullet.parent, Player) else 9
+            out[channel, bullet.location.y, bullet.location.x] = 1
+        for bonus in game_map.get_objects(Bonus):
+            out[10, bonus.location.y, bonus.location.x] = 1
+        return out
+
+
+class VecEnv:
+    def __init__(self, count, size=13, ticks_per_step=16, max_steps=2000):
+        self.envs = [
+            BattleCityEnv(size, ticks_per_step, max_steps)
+            for _ in range(count)
+        ]
+        self.count = count
+        self.observations = np.zeros(
+            (count,) + self.envs[0].observation_shape, dtype=np.uint8)
+
+    def reset(self, seeds=None):
+        if seeds is None:
+            seeds = [None] * self.count
+        infos = list()
+        for i, env in enumerate(self.envs):
+            _, info = env.reset(seeds[i])
+            env.observe(self.observations[i])
+            infos.append(info)
+        return self.observations.copy(), infos
+
+    def step(self, actions):
+        rewards = np.zeros(self.count, dtype=np.float32)
+        terminated = np.zeros(self.count, dtype=bool)
+        truncated = np.zeros(self.count, dtype=bool)
+        infos = list()
+
+        for i, env in enumerate(self.envs):
+            _, rewards[i], terminated[i], truncated[i], info = \
+                env.step(int(actions[i]))
+            if terminated[i] or truncated[i]:
+                info["final_observation"] = env.observe()
+                _, reset_info = env.reset()
+                info["seed"] = reset_info["seed"]
+            env.observe(self.observations[i])
+            infos.append(info)
+
+        return (self.observations.copy(), rewards,
+                terminated, truncated, infos)
+
+    def close(self):
+        pass
+
+
+def _worker(connection, count, size, ticks_per_step, max_steps):
+    env = VecEnv(count, size, ticks_per_step, max_steps)
+    while True:
+        command, data = connection.recv()
+        if command == "reset":
+            connection.send(env.reset(data))
+        elif command == "step":
+            connection.send(env.step(data))
+        elif command == "close":
+            connection.close()
+            return
+
+
+class SubprocVecEnv:
+    def __init__(self, count, workers=2, size=13,
+                 ticks_per_step=16, max_steps=2000):
+        self.count = count
+        self.chunks = [
+            count // workers + (1 if i < count % workers else 0)
+            for i in range(workers)
+        ]
+        self.chunks = [chunk for chunk in self.chunks if chunk]
+        self.connections = list()
+        self.processes = list()
+        for chunk in self.chunks:
+            parent, child = Pipe()
+            process = Process(
+                target=_worker, daemon=True,
+                args=(child, chunk, size, ticks_per_step, max_steps))
+            process.start()
+            child.close()
+            self.connections.append(parent)
+            self.processes.append(process)
+
+    def _split(self, values):
+        parts = list()
+        start = 0
+        for chunk in self.chunks:
+            parts.append(values[start:start + chunk])
+            start += chunk
+        return parts
+
+    def reset(self, seeds=None):
+        if seeds is None:
+            seeds = [None] * self.count
+        for connection, part in zip(self.connections, self._split(seeds)):
+            connection.send(("reset", part))
+        results = [connection.recv() for connection in self.connections]
+        observations = np.concatenate([r[0] for r in results])
+        infos = [info for r in results for info in r[1]]
+        return observations, infos
+
+    def step(self, actions):
+        for connection, part in zip(self.connections, self._split(actions)):
+            connection.send(("step", part))
+        results = [connection.recv() for connection in self.connections]
+        observations = np.concatenate([r[0] for r in results])
+        rewards = np.concatenate([r[1] for r in results])
+        terminated = np.concatenate([r[2] for r in results])
+        truncated = np.concatenate([r[3] for r in results])
+        infos = [info for r in results for info in r[4]]
+        return observations, rewards, terminated, truncated, infos
+
+    def close(self):
+        for connection in self.connections:
+            connection.send(("close", None))
+            connection.close()
+        for process in self.processes:
+            process.join()
@@ -1,5 +1,6 @@
 from domain.infrastructure.geometry import Point, Direction
-from application.level import CellState
+from domain.infrastructure.clock import Clock
+from application.level import CellState, STATES
 from domain.enemy import Enemy, EnemyType
 from application.ai import EnemyAI
 from domain.obstacle import Wall, WallType
@@ -12,7 +13,9 @@ from domain.boom import Boom, BoomType
 from domain.bonus import Bonus, BonusType
 
 from enum import Enum
+import datetime
 import random
+import re
 
 
 class GameStatus(Enum):
@@ -22,61 +25,101 @@ class GameStatus(Enum):
     Win = 4
 
 
+BONUS_DURATION = datetime.timedelta(milliseconds=10000)
+OCCUPIED = re.compile(b"[^%c]" % CellState.Empty.value)
+
+
 class Game:
-    def __init__(self, size=13):
+    def __init__(self, size=13, seed=None):
         self.size = size
+        self.seed = random.randrange(2 ** 32) if seed is None else seed
+        self.random = random.Random(self.seed)
         self.map = None
         self.level = None
         self.player = None
         self.status = None
         self.score = 0
+        self.kills = 0
         self.bonus_count = 0
         self.ai = EnemyAI(self)
         self.level_num = 1
         self.spawn_count_haunting = 0
         self.spawn_count_patrolling = 0
+        self.levels_count = 1
+
+        self.clock = Clock()
+        self.events = list()
+        self.booms = list()
+        self.observers = list()
+        self.last_input = (None, False)
+        self.count = 0
+        self.game_speed = 16
+        self._player_speed = 16
+        self.enemy_bullet_speed = 8
+        self._player_bullet_speed = 8
+
+    @property
+    def player_speed(self):
+        if self.player.speed_runner:
+            return self._player_speed / 2 - 1
+        return self._player_speed
+
+    @property
+    def player_bullet_speed(self):
+        if self.player.fast_shooting:
+            return self._player_bullet_speed / 2
+        return self._player_bullet_speed
 
     def start(self, level):
         self.level = level
         self.map = Map(self.size)
-        for y, line in enumerate(level):
-            for x in range(len(line)):
-                self._load_obj(line, x, y)
+        cells = getattr(level, "cells", None)
+        if isinstance(cells, (bytes, bytearray, memoryview)):
+            self._load_cells(cells)
+        else:
+            for y, line in enumerate(level):
+                for x in range(len(line)):
+                    self._load_obj(line[x], x, y)
         self.spawn_count_haunting = 10 - len(self.map.get_enemies()) * 2
         self.spawn_count_patrolling = self.spawn_count_haunting // 2
         if self.player:
             self.status = GameStatus.Process
             return self
 
-    def _load_obj(self, line, x, y):
+    def _load_cells(self, cells):
+        for match in OCCUPIED.finditer(cells):
+            y, x = divmod(match.start(), self.size)
+            self._load_obj(STATES[cells[match.start()]], x, y)
+
+    def _load_obj(self, state, x, y):
         location = Point(x, y)
-        if line[x] == CellState.BrickWall:
+        if state == CellState.BrickWall:
             self.map[location].add(
                 Wall(location, WallType.Brick))
 
-        elif line[x] == CellState.ConcreteWall:
+        elif state == CellState.ConcreteWall:
             self.map[location].add(
                 Wall(location, WallType.Concrete))
 
-        elif line[x] == CellState.Player:
+        elif state == CellState.Player:
             self.player = Player(
-                location, Direction.Up, 3)
+                location, Direction.Up, 3, clock=self.clock)
             self.map[location].add(self.player)
 
-        elif line[x] == CellState.Terrain:
+        elif state == CellState.Terrain:
             self.map[location].add(Grass(location))
 
-        elif line[x] == CellState.PatrollingEnemy:
+        elif state == CellState.PatrollingEnemy:
             self.map[location].add(
                 Enemy(EnemyType.Patrolling,
-                      location, Direction.Up, 1))
+                      location, Direction.Up, 1, clock=self.clock))
 
-        elif line[x] == CellState.HauntingEnemy:
+        elif state == CellState.HauntingEnemy:
             self.map[location].add(
                 Enemy(EnemyType.Haunting,
-                      location, Direction.Up, 2))
+                      location, Direction.Up, 2, clock=self.clock))
 
-        elif line[x] == CellState.PlayerFlag:
+        elif state == CellState.PlayerFlag:
             self.map[location].add(Flag(location))
 
     def move_player(self, direction):
@@ -103,7 +146,7 @@ class Game:
                     self.player.health -= 1
                     self.player.velocity = Point(0, 0)
                     return
-                self.map[new_location].add(Boom(new_location))
+                self.explode(Boom(new_location))
                 self.spawn_player()
 
             elif isinstance(bullet.parent, Player):
@@ -129,7 +172,7 @@ class Game:
         if not available_locations:
             return
 
-        location = random.choice(available_locations)
+        location = self.random.choice(available_locations)
         self.map.swap(self.player, location)
         self.player.recover(location)
 
@@ -183,36 +226,40 @@ class Game:
             if isinstance(obj, Bullet) and obj != bullet:
                 self._bullet_with_bullet(obj, location)
 
+    def explode(self, boom):
+        # Explosions are only shown, they never occupy a cell.
+        self.booms.append(boom)
+        self.events.append(
+            "brick" if boom.type == BoomType.Wall else "boom")
+
     def _bullet_with_wall(self, wall, location):
-        boom = Boom(location, _type=BoomType.Wall)
         self.map[location].remove(wall)
-        self.map[location].add(boom)
+        self.explode(Boom(location, _type=BoomType.Wall))
 
     def _bullet_with_enemy(self, enemy, location):
         if enemy.health > 1:
             enemy.health -= 1
         else:
             self.score += 1
-            boom = Boom(location)
+            self.kills += 1
             if enemy in self.map[location]:
                 self.map[location].remove(enemy)
-            self.map[location].add(boom)
+            self.explode(Boom(location))
 
     def _bullet_with_player(self, player, location):
         if not player.invulnerability:
             if not player.armor:
                 player.health -= 1
                 if player.health == 0:
-                    self.map[location].add(Boom(location))
+                    self.explode(Boom(location))
                     self.spawn_player()
             else:
                 player.armor = False
 
     def _bullet_with_flag(self, flag, location):
-        boom = Boom(location, _type=BoomType.Wall)
         self.status = GameStatus.End
         self.map[location].remove(flag)
-        self.map[location].add(boom)
+        self.explode(Boom(location, _type=BoomType.Wall))
 
     def _bullet_with_bullet(self, bullet, location):
         if bullet in bullet.parent.bullets:
@@ -242,8 +289,9 @@ class Game:
                         enemy.health -= 1
                         return
                     self.score += 1
+                    self.kills += 1
                     self.map[enemy.location].remove(enemy)
-                    self.map[new_location].add(Boom(new_location))
+                    self.explode(Boom(new_location))
             else:
                 self.map.swap(enemy, new_location)
                 enemy.move(direction)
@@ -266,19 +314,19 @@ class Game:
         if not available_locations or exist_count >= 3:
             return
 
-        location = random.choice(available_locations)
-        if random.randint(0, 1):
+        location = self.random.choice(available_locations)
+        if self.random.randint(0, 1):
             if self.spawn_count_haunting > 0:
                 self.spawn_count_haunting -= 1
                 self.map[location].add(Enemy(
                     EnemyType.SpawnHaunting, location,
-                    Direction.Down, 2))
+                    Direction.Down, 2, clock=self.clock))
         else:
             if self.spawn_count_patrolling > 0:
                 self.spawn_count_patrolling -= 1
                 self.map[location].add(Enemy(
                     EnemyType.SpawnPatrolling, location,
-                    Direction.Down, 1))
+                    Direction.Down, 1, clock=self.clock))
 
     def shoot(self):
         if self.player.cheat == 0:
@@ -314,7 +362,134 @@ class Game:
             if len(self.map[location]) == 0
         ]
 
-        location = random.choice(available_cells)
-        _type = random.choice(list(BonusType))
+        location = self.random.choice(available_cells)
+        _type = self.random.choice(list(BonusType))
         bonus = Bonus(location, _type)
         self.map[location].add(bonus)
+
+    def update(self, direction=None, fire=False):
+        self.events = list()
+        self.booms = list()
+        self.last_input = (direction, fire)
+        self.count += 1
+        self.clock.advance()
+
+        if self.count % self.game_speed == 0:
+            self.update_enemies()
+            self.update_bonuses()
+
+        if self.count % self.player_speed == 0:
+            if self.player.health:
+                self.update_player(direction)
+
+        if self.count % self.player_bullet_speed == 0:
+            self.move_player_bullets()
+
+        if self.count % self.enemy_bullet_speed == 0:
+            self.move_enemy_bullets()
+
+        if fire and self.shoot():
+            self.events.append("fire")
+        self.count %= self.game_speed
+
+        for observer in self.observers:
+            observer(self)
+
+    def update_enemies(self):
+        if not self.map.get_enemies():
+            self.level_num += 1
+            if self.levels_count == self.level_num - 1:
+                self.status = GameStatus.Win
+            else:
+                self.status = GameStatus.NextLevel
+            return
+        self.move_enemies()
+        self.spawn_enemy()
+
+    def update_player(self, direction):
+        if direction:
+            self.move_player(direction)
+        else:
+            self.player.velocity = Point(0, 0)
+
+        if self.score >= 5 and self.player.level == 1:
+            self.player.up_level()
+
+    def update_bonuses(self):
+        now = self.clock.now()
+        if self.player.invulnerability:
+            if now - self.player.invulnerability > BONUS_DURATION:
+                self.player.invulnerability = None
+
+        if self.player.speed_runner:
+            if now - self.player.speed_runner > BONUS_DURATION:
+                self.player.speed_runner = None
+
+        if self.player.fast_shooting:
+            if now - self.player.fast_shooting > BONUS_DURATION:
+                self.player.fast_shooting = None
+
+        for bonus in self.map.get_bonuses():
+            if bonus.exists == 0:
+                self.map[bonus.location].remove(bonus)
+            else:
+                bonus.exists -= 1
+
+        if self.score not in [0, self.bonus_count] \
+                and self.score % 3 == 0:
+            self.bonus_count = self.score
+            self.add_bonus()
+            self.events.append("bonus")
+
+    def _is_idle(self, ticks, direction, fire):
+        count = self.count + ticks
+        if count % self.game_speed == 0:
+            return False
+
+        if self.player.health and count % self.player_speed == 0:
+            if direction or self.player.velocity != Point(0, 0):
+                return False
+            if self.score >= 5 and self.player.level == 1:
+                return False
+
+        if self.player.bullets and \
+                count % self.player_bullet_speed == 0:
+            return False
+
+        if count % self.enemy_bullet_speed == 0:
+            for enemy in self.map.get_enemies():
+                if enemy.bullets:
+                    return False
+
+        if fire:
+            now = self.clock.now() + self.clock.tick * ticks
+            if self.player.can_shoot(now):
+                return False
+        return True
+
+    def idle_ticks(self, direction=None, fire=False):
+        ticks = 1
+        while self._is_idle(ticks, direction, fire):
+            ticks += 1
+        return ticks - 1
+
+    def skip(self, ticks):
+        self.count += ticks
+        self.clock.advance(ticks)
+
+    def step(self, direction=None, fire=False):
+        ticks = self.idle_ticks(direction, fire)
+        self.skip(ticks)
+        self.update(direction, fire)
+        return ticks + 1
+
+    def fast_forward(self, ticks, direction=None, fire=False):
+        elapsed = 0
+        while elapsed < ticks and self.status == GameStatus.Process:
+            idle = min(self.idle_ticks(direction, fire), ticks - elapsed)
+            self.skip(idle)
+            elapsed += idle
+            if elapsed < ticks:
+                self.update(direction, fire)
+                elapsed += 1
+        return elapsed
@@ -0,0 +1,65 @@
+LEVELS = ["full", "no interpolation", "no hud", "frame skip"]
+
+# Smoothing factor of the load average, per frame.
+SMOOTHING = 0.1
+# Frames to wait after a change before judging the load again.
+SETTLE = 30
+HUD_PERIOD = 10
+FRAME_SKIP = 2
+
+
+class FrameGovernor:
+    def __init__(self, budget, high=0.9, low=0.5, hold=120):
+        self.budget = budget
+        self.high = high
+        self.low = low
+        self.hold = hold
+        self.level = 0
+        self.load = 0.0
+        self.frames = 0
+        self.simulation = 0.0
+        self.painting = 0.0
+        self._calm = 0
+        self._settle = 0
+
+    @property
+    def name(self):
+        return LEVELS[self.level]
+
+    @property
+    def interpolate(self):
+        return self.level < 1
+
+    def hud_due(self):
+        return self.level < 2 or self.frames % HUD_PERIOD == 0
+
+    def paint_due(self):
+        return self.level < 3 or self.frames % FRAME_SKIP == 0
+
+    def frame(self):
+        # Called once per display frame with the time spent simulating
+        # and painting since the previous one.
+        used = (self.simulation + self.painting) / self.budget
+        self.simulation = self.painting = 0.0
+        self.load += (used - self.load) * SMOOTHING
+        self.frames += 1
+
+        if self._settle:
+            self._settle -= 1
+        elif self.load > self.high:
+            if self.level < len(LEVELS) - 1:
+                self._step(1)
+        elif self.load < self.low:
+            # Recover slowly so a short quiet spell does not bring
+            # the stutter straight back.
+            self._calm += 1
+            if self._calm >= self.hold and self.level:
+                self._step(-1)
+        else:
+            self._calm = 0
+        return self.level
+
+    def _step(self, step):
+        self.level += step
+        self._calm = 0
+        self._settle = SETTLE
@@ -1,5 +1,6 @@
 from enum import Enum
 import random
+import bisect
 
 
 class CellState(Enum):
@@ -15,120 +16,255 @@ class CellState(Enum):
     Bonus = 9
 
 
+STATES = {state.value: state for state in CellState}
+
+# Bump whenever create_level would build a different board for the
+# same size, seed and parameters, so cached levels are regenerated.
+GENERATOR_VERSION = 2
+
+# Concrete wall layouts tried before giving up on a connected board.
+MAX_ATTEMPTS = 100
+
+
+def player_base(size):
+    return [
+        (size - 3, size // 2),
+        (size - 3, size // 2 - 1),
+        (size - 3, size // 2 + 1),
+        (size - 3, size // 2 - 2),
+        (size - 3, size // 2 + 2),
+        (size - 1, size // 2),
+        (size - 2, size // 2),
+        (size - 2, size // 2 - 1),
+        (size - 2, size // 2 + 1),
+        (size - 1, size // 2 + 1),
+        (size - 1, size // 2 - 1)
+    ]
+
+
+def enemies_base(size):
+    return [
+        # Central
+        (0, size // 2),
+        (1, size // 2),
+        (1, size // 2 - 1),
+        (1, size // 2 + 1),
+        (0, size // 2 + 1),
+        (0, size // 2 - 1),
+
+        # Left
+        (0, size // 2 - 5),
+        (0, size // 2 - 6),
+        (1, size // 2 - 5),
+        (1, size // 2 - 6),
+        (2, size // 2 - 5),
+        (2, size // 2 - 4),
+
+        # Right
+        (0, size // 2 + 5),
+        (0, size // 2 + 6),
+        (1, size // 2 + 5),
+        (1, size // 2 + 6),
+        (2, size // 2 + 5),
+        (2, size // 2 + 4),
+    ]
+
+
+class CellPool:
+    # The free cells as a virtual array of flat indices. Only slots
+    # that differ from their index are stored, so removal is a swap
+    # with the last slot and huge boards cost nothing up front.
+    def __init__(self, count):
+        self.count = count
+        self._slots = dict()
+        self._positions = dict()
+
+    def __len__(self):
+        return self.count
+
+    def __contains__(self, index):
+        slot = self._positions.get(index, index)
+        return slot < self.count and self._slots.get(slot, slot) == index
+
+    def _put(self, slot, index):
+        if slot == index:
+            self._slots.pop(slot, None)
+            self._positions.pop(index, None)
+        else:
+            self._slots[slot] = index
+            self._positions[index] = slot
+
+    def _remove_slot(self, slot):
+        last = self.count - 1
+        index = self._slots.get(slot, slot)
+        moved = self._slots.pop(last, last)
+        self._positions.pop(moved, None)
+        self._positions.pop(index, None)
+        if slot != last:
+            self._put(slot, moved)
+        self.count = last
+        return index
+
+    def sample(self, rng):
+        return self._remove_slot(rng.randrange(self.count))
+
+    def discard(self, index):
+        if index in self:
+            self._remove_slot(self._positions.get(index, index))
+
+    def add(self, index):
+        self._put(self.count, index)
+        self.count += 1
+
+
+class DisjointSet:
+    def __init__(self):
+        self.parent = list()
+
+    def make(self):
+        self.parent.append(len(self.parent))
+        return len(self.parent) - 1
+
+    def find(self, node):
+        parent = self.parent
+        while parent[node] != node:
+            parent[node] = parent[parent[node]]
+            node = parent[node]
+        return node
+
+    def union(self, first, second):
+        self.parent[self.find(first)] = self.find(second)
+
+
+def open_runs(size, walls):
+    # Maximal horizontal runs of open cells per row, as (start, end).
+    columns = dict()
+    for index in walls:
+        row, column = divmod(index, size)
+        columns.setdefault(row, list()).append(column)
+
+    runs = [[(0, size - 1)]] * size
+    for row, blocked in columns.items():
+        start = 0
+        runs[row] = list()
+        for column in sorted(blocked) + [size]:
+            if column > start:
+                runs[row].append((start, column - 1))
+            start = column + 1
+    return runs
+
+
+def connected(size, walls, points):
+    # Union-find over runs of open cells rather than single cells, so
+    # the check grows with the number of walls, not with the board.
+    runs = open_runs(size, walls)
+    components = DisjointSet()
+    nodes = list()
+    for row in range(size):
+        nodes.append([components.make() for _ in runs[row]])
+        if not row:
+            continue
+        above, below = runs[row - 1], runs[row]
+        i = j = 0
+        while i < len(above) and j < len(below):
+            if above[i][0] <= below[j][1] and below[j][0] <= above[i][1]:
+                components.union(nodes[row - 1][i], nodes[row][j])
+            if above[i][1] < below[j][1]:
+                i += 1
+            else:
+                j += 1
+
+    roots = set()
+    for row, column in points:
+        starts = [start for start, _ in runs[row]]
+        run = bisect.bisect_right(starts, column) - 1
+        if run < 0 or runs[row][run][1] < column:
+            return False
+        roots.add(components.find(nodes[row][run]))
+    return len(roots) <= 1
+
+
+def spawn_points(size):
+    bases = enemies_base(size)
+    return [(row, column) for row, column in [bases[0], bases[6], bases[12]]
+            if 0 <= column < size]
+
+
+def key_points(size):
+    return [(size - 3, size // 2), (size - 1, size // 2)] + spawn_points(size)
+
+
+def rows(cells, size):
+    for y in range(size):
+        row = cells[y * size:(y + 1) * size]
+        yield [STATES[code] for code in row]
+
+
 class Level:
     def __init__(self, size, seed):
         self.size = size
         self.seed = seed
-        random.seed(seed)
-
-        self.level = [
-            [CellState.Empty] * size
-            for _ in range(size)
-        ]
+        self.random = random.Random(seed)
 
+        self.cells = bytearray([CellState.Empty.value]) * (size * size)
         self._set_player_base(size)
         self.enemies_base = self.get_enemies_base()
+        self._concrete = list()
 
-        left_tunnel = [
-            (size - x, size // 2 - 3)
-            for x in range(3, size)
+        reserved = self.get_player_base() + self.enemies_base + [
+            (2, size // 2 - 2),
+            (2, size // 2 - 1),
+            (2, size // 2 + 2),
+            (2, size // 2 + 1)
         ]
-
-        right_tunnel = [
-            (size - x, size // 2 + 3)
-            for x in range(3, size)
-        ]
-
-        self._free_cells = [
-            (x, y)
-            for x in range(self.size)
-            for y in range(self.size)
-
-            # Player base
-            if (x, y) != (size - 3, size // 2)
-            if (x, y) != (size - 3, size // 2 - 1)
-            if (x, y) != (size - 3, size // 2 + 1)
-            if (x, y) != (size - 3, size // 2 - 2)
-            if (x, y) != (size - 3, size // 2 + 2)
-            if (x, y) != (size - 1, size // 2)
-            if (x, y) != (size - 2, size // 2)
-            if (x, y) != (size - 2, size // 2 - 1)
-            if (x, y) != (size - 2, size // 2 + 1)
-            if (x, y) != (size - 1, size // 2 + 1)
-            if (x, y) != (size - 1, size // 2 - 1)
-
+        for x in range(3, size):
             # Tunnels
-            if (x, y) not in left_tunnel
-            if (x, y) not in right_tunnel
-
-            # Enemy base
-            if (x, y) not in self.enemies_base
-            if (x, y) != (2, size // 2 - 2)
-            if (x, y) != (2, size // 2 - 1)
-            if (x, y) != (2, size // 2 + 2)
-            if (x, y) != (2, size // 2 + 1)
-        ]
+            reserved.append((size - x, size // 2 - 3))
+            reserved.append((size - x, size // 2 + 3))
+
+        self._free_cells = CellPool(size * size)
+        for row, column in reserved:
+            if 0 <= row < size and 0 <= column < size:
+                self._free_cells.discard(row * size + column)
 
     def get_player_base(self):
-        return [
-            (self.size - 3, self.size // 2),
-            (self.size - 3, self.size // 2 - 1),
-            (self.size - 3, self.size // 2 + 1),
-            (self.size - 3, self.size // 2 - 2),
-            (self.size - 3, self.size // 2 + 2),
-            (self.size - 1, self.size // 2),
-            (self.size - 2, self.size // 2),
-            (self.size - 2, self.size // 2 - 1),
-            (self.size - 2, self.size // 2 + 1),
-            (self.size - 1, self.size // 2 + 1),
-            (self.size - 1, self.size // 2 - 1)
-        ]
+        return player_base(self.size)
 
     def get_enemies_base(self):
-        return [
-            # Central
-            (0, self.size // 2),
-            (1, self.size // 2),
-            (1, self.size // 2 - 1),
-            (1, self.size // 2 + 1),
-            (0, self.size // 2 + 1),
-            (0, self.size // 2 - 1),
-
-            # Left
-            (0, self.size // 2 - 5),
-            (0, self.size // 2 - 6),
-            (1, self.size // 2 - 5),
-            (1, self.size // 2 - 6),
-            (2, self.size // 2 - 5),
-            (2, self.size // 2 - 4),
-
-            # Right
-            (0, self.size // 2 + 5),
-            (0, self.size // 2 + 6),
-            (1, self.size // 2 + 5),
-            (1, self.size // 2 + 6),
-            (2, self.size // 2 + 5),
-            (2, self.size // 2 + 4),
-        ]
+        return enemies_base(self.size)
+
+    def _set(self, point, game_obj):
+        self.cells[point[0] * self.size + point[1]] = game_obj.value
 
     def _set_player_base(self, size):
-        self.level[size - 3][size // 2] = CellState.Player
-        self.level[size - 3][size // 2 - 1] = CellState.Empty
-        self.level[size - 3][size // 2 + 1] = CellState.Empty
-        self.level[size - 3][size // 2 + 2] = CellState.Empty
-        self.level[size - 3][size // 2 - 2] = CellState.Empty
-        self.level[size - 1][size // 2] = CellState.PlayerFlag
-        self.level[size - 2][size // 2] = CellState.BrickWall
-        self.level[size - 2][size // 2 - 1] = CellState.BrickWall
-        self.level[size - 2][size // 2 + 1] = CellState.BrickWall
-        self.level[size - 1][size // 2 + 1] = CellState.BrickWall
-        self.level[size - 1][size // 2 - 1] = CellState.BrickWall
+        self._set((size - 3, size // 2), CellState.Player)
+        self._set((size - 1, size // 2), CellState.PlayerFlag)
+        self._set((size - 2, size // 2), CellState.BrickWall)
+        self._set((size - 2, size // 2 - 1), CellState.BrickWall)
+        self._set((size - 2, size // 2 + 1), CellState.BrickWall)
+        self._set((size - 1, size // 2 + 1), CellState.BrickWall)
+        self._set((size - 1, size // 2 - 1), CellState.BrickWall)
 
     def with_brick_walls(self, count):
         return self._with(count, CellState.BrickWall)
 
     def with_concrete_walls(self, count):
-        return self._with(count, CellState.ConcreteWall)
+        points = key_points(self.size)
+        for _ in range(MAX_ATTEMPTS):
+            walls = self._sample(count)
+            if connected(self.size, self._concrete + walls, points):
+                break
+            for index in walls:
+                self._free_cells.add(index)
+        else:
+            raise ValueError(
+                f"Could not place {count} concrete walls "
+                f"without cutting off a base")
+
+        self._concrete += walls
+        for index in walls:
+            self.cells[index] = CellState.ConcreteWall.value
+        return self
 
     def with_patrolling_enemies(self, count):
         return self._with(count, CellState.PatrollingEnemy)
@@ -139,17 +275,43 @@ class Level:
     def with_terrains(self, count):
         return self._with(count, CellState.Terrain)
 
+    def _sample(self, count):
+        return [self._free_cells.sample(self.random) for _ in range(count)]
+
     def _with(self, count, game_obj):
-        for _ in range(count):
-            if game_obj in [CellState.HauntingEnemy,
-                            CellState.PatrollingEnemy]:
-                point = random.choice(self.enemies_base)
-                self.enemies_base.remove(point)
-            else:
-                point = random.choice(self._free_cells)
-                self._free_cells.remove(point)
-            self.level[point[0]][point[1]] = game_obj
+        if game_obj in [CellState.HauntingEnemy,
+                        CellState.PatrollingEnemy]:
+            for _ in range(count):
+                bases = self.enemies_base
+                i = self.random.randrange(len(bases))
+                point = bases[i]
+                bases[i] = bases[-1]
+                bases.pop()
+                self._set(point, game_obj)
+        else:
+            for index in self._sample(count):
+                self.cells[index] = game_obj.value
         return self
 
     def __iter__(self):
-        return iter(self.level)
+        return rows(self.cells, self.size)
+
+
+def default_params(size):
+    return {
+        "brick_walls": size * 2,
+        "concrete_walls": size,
+        "terrains": size // 2,
+        "patrolling_enemies": 1,
+        "haunting_enemies": 1
+    }
+
+
+def create_level(size, seed, params=None):
+    params = params or default_params(size)
+    return (Level(size, seed)
+            .with_brick_walls(params["brick_walls"])
+            .with_concrete_walls(params["concrete_walls"])
+            .with_terrains(params["terrains"])
+            .with_patrolling_enemies(params["patrolling_enemies"])
+            .with_haunting_enemies(params["haunting_enemies"]))
@@ -0,0 +1,101 @@
+from application.level import GENERATOR_VERSION, create_level, default_params
+from application.level_file import (
+    LevelData, LevelFileError, encode_cells, write_raw, map_raw)
+
+from threading import Thread, Lock
+import tempfile
+import hashlib
+import json
+import os
+
+
+def cache_key(size, seed, params):
+    description = json.dumps(
+        [GENERATOR_VERSION, size, seed, sorted(params.items())])
+    return hashlib.sha256(description.encode()).hexdigest()
+
+
+class LevelCache:
+    def __init__(self, directory):
+        self.directory = directory
+        self.hits = 0
+        self.misses = 0
+
+    def path(self, key):
+        return os.path.join(self.directory, key[:2], f"{key}.bclr")
+
+    def get(self, size, seed, params=None):
+        params = params or default_params(size)
+        path = self.path(cache_key(size, seed, params))
+        try:
+            level = map_raw(path)
+        except (OSError, LevelFileError):
+            pass
+        else:
+            self.hits += 1
+            return level
+
+        self.misses += 1
+        level = create_level(size, seed, params)
+        self._store(path, level)
+        return LevelData(size, seed, encode_cells(level))
+
+    def _store(self, path, level):
+        # Parallel workers may generate the same level at once; each
+        # writes its own temporary file and the rename is atomic.
+        # A cache that cannot be written is skipped, the level is
+        # still used.
+        directory = os.path.dirname(path)
+        temp = None
+        try:
+            os.makedirs(directory, exist_ok=True)
+            handle, temp = tempfile.mkstemp(suffix=".tmp", dir=directory)
+            os.close(handle)
+            write_raw(temp, level)
+            os.replace(temp, path)
+        except OSError:
+            if temp is not None and os.path.exists(temp):
+                os.remove(temp)
+
+
+class LevelQueue:
+    def __init__(self, seeds, load):
+        self.seeds = list(seeds)
+        self._load = load
+        self._levels = dict()
+        self._workers = dict()
+        self._lock = Lock()
+
+    def __len__(self):
+        return len(self.seeds)
+
+    def __getitem__(self, index):
+        worker = self._workers.get(index)
+        if worker:
+            worker.join()
+        with self._lock:
+            level = self._levels.get(index)
+        if level is None:
+            level = self._load(self.seeds[index])
+            with self._lock:
+                self._levels[index] = level
+        # Build the following level while this one is being played.
+        self.prefetch(index + 1)
+        return level
+
+    def ready(self, index):
+        with self._lock:
+            return index in self._levels
+
+    def prefetch(self, index):
+        if (index >= len(self.seeds) or index in self._workers
+                or self.ready(index)):
+            return
+        worker = Thread(target=self._generate, args=(index,), daemon=True)
+        self._workers[index] = worker
+        worker.start()
+
+    def _generate(self, index):
+        level = self._load(self.seeds[index])
+        with self._lock:
+            self._levels[index] = level
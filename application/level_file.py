@@ -0,0 +1,184 @@
+from application.level import (
+    CellState, create_level, player_base, enemies_base, rows)
+
+import argparse
+import struct
+import mmap
+import zlib
+import io
+import os
+import re
+
+
+MAGIC = b"BCLV"
+RAW_MAGIC = b"BCLR"
+VERSION = 1
+
+HEADER = struct.Struct("<4sHIq")
+CHUNK_SIZE = 1 << 16
+NO_SEED = -1
+UNKNOWN_CELL = re.compile(b"[^%s-%s]" % (
+    re.escape(bytes([0])), re.escape(bytes([len(CellState) - 1]))))
+
+SYMBOLS = {
+    CellState.Player: "@",
+    CellState.PlayerFlag: "F",
+    CellState.BrickWall: "#",
+    CellState.ConcreteWall: "X",
+    CellState.Terrain: '"',
+    CellState.Bullet: "*",
+    CellState.Empty: ".",
+    CellState.PatrollingEnemy: "P",
+    CellState.HauntingEnemy: "H",
+    CellState.Bonus: "+"
+}
+
+
+class LevelFileError(Exception):
+    pass
+
+
+def _check_cells(cells):
+    if UNKNOWN_CELL.search(cells):
+        raise LevelFileError("Unknown cell state in level data")
+
+
+class LevelData:
+    def __init__(self, size, seed, cells):
+        self.size = size
+        self.seed = seed
+        self.cells = cells
+
+    def get_player_base(self):
+        return player_base(self.size)
+
+    def get_enemies_base(self):
+        return enemies_base(self.size)
+
+    def __iter__(self):
+        return rows(self.cells, self.size)
+
+
+def encode_cells(level):
+    cells = getattr(level, "cells", None)
+    if cells is not None:
+        return bytes(cells)
+    return bytes(state.value for row in level for state in row)
+
+
+def dumps(level, compression=6):
+    seed = getattr(level, "seed", None)
+    header = HEADER.pack(MAGIC, VERSION, level.size,
+                         seed if isinstance(seed, int) else NO_SEED)
+    return header + zlib.compress(encode_cells(level), compression)
+
+
+def _read(file):
+    header = file.read(HEADER.size)
+    if len(header) != HEADER.size:
+        raise LevelFileError("Truncated level header")
+    magic, version, size, seed = HEADER.unpack(header)
+    if magic != MAGIC:
+        raise LevelFileError("Not a Battle City level")
+    if version != VERSION:
+        raise LevelFileError(f"Unsupported level version {version}")
+
+    total = size * size
+    cells = bytearray(total)
+    view = memoryview(cells)
+    offset = 0
+    decompressor = zlib.decompressobj()
+    while not decompressor.eof:
+        chunk = file.read(CHUNK_SIZE)
+        if not chunk:
+            break
+        # Inflate straight into the cell buffer, one bounded piece at
+        # a time, so large levels never exist twice in memory.
+        while chunk:
+            data = decompressor.decompress(chunk, total - offset + 1)
+            if offset + len(data) > total:
+                raise LevelFileError("Level has more cells than its size")
+            view[offset:offset + len(data)] = data
+            offset += len(data)
+            chunk = decompressor.unconsumed_tail
+    if offset != total or not decompressor.eof:
+        raise LevelFileError("Truncated level data")
+    _check_cells(cells)
+    return LevelData(size, None if seed == NO_SEED else seed, cells)
+
+
+def loads(data):
+    return _read(io.BytesIO(data))
+
+
+def read(path):
+    with open(path, "rb") as file:
+        return _read(file)
+
+
+def write(path, level, compression=6):
+    data = dumps(level, compression)
+    with open(path, "wb") as file:
+        file.write(data)
+    return len(data)
+
+
+def write_raw(path, level):
+    seed = getattr(level, "seed", None)
+    with open(path, "wb") as file:
+        file.write(HEADER.pack(RAW_MAGIC, VERSION, level.size,
+                               seed if isinstance(seed, int) else NO_SEED))
+        file.write(encode_cells(level))
+
+
+def map_raw(path):
+    with open(path, "rb") as file:
+        if os.fstat(file.fileno()).st_size < HEADER.size:
+            raise LevelFileError("Truncated level header")
+        mapped = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+    magic, version, size, seed = HEADER.unpack_from(mapped)
+    if magic != RAW_MAGIC or version != VERSION:
+        raise LevelFileError("Not a raw Battle City level")
+    if len(mapped) != HEADER.size + size * size:
+        raise LevelFileError("Truncated level data")
+    cells = memoryview(mapped)[HEADER.size:]
+    _check_cells(cells)
+    return LevelData(size, None if seed == NO_SEED else seed, cells)
+
+
+def render(level):
+    return "\n".join(
+        "".join(SYMBOLS[state] for state in row) for row in level)
+
+
+def create_parser():
+    parser = argparse.ArgumentParser(
+        description="Write and inspect compact Battle City level files")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    writer = commands.add_parser("write", help="generate levels to files")
+    writer.add_argument("seeds", type=int, nargs="+")
+    writer.add_argument("--size", type=int, default=13)
+    writer.add_argument("--output", default=".")
+
+    reader = commands.add_parser("show", help="print a level file")
+    reader.add_argument("path")
+    return parser
+
+
+def main():
+    args = create_parser().parse_args()
+    if args.command == "write":
+        os.makedirs(args.output, exist_ok=True)
+        for seed in args.seeds:
+            path = os.path.join(args.output, f"level_{seed}.bcl")
+            size = write(path, create_level(args.size, seed))
+            print(f"{path}: {size} bytes")
+    else:
+        level = read(args.path)
+        print(f"{level.size}x{level.size}, seed {level.seed}")
+        print(render(level))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+from domain.boom import BoomType
+
+
+FLASH = "flash"
+CAPACITY = 512
+
+# Particles each emitter starts: sprite, delay and lifetime in ticks,
+# scale at birth and at death, and whether it fades out.
+EMITTERS = {
+    BoomType.Small: [("boom_1", 0, 16, 0.6, 1.0, False),
+                     ("boom_2", 12, 20, 0.8, 1.2, True)],
+    BoomType.Big: [("boom_2", 0, 20, 0.8, 1.2, True)],
+    BoomType.Wall: [("boom_wall", 0, 14, 1.0, 1.0, True)],
+    FLASH: [("boom_1", 0, 4, 0.5, 0.2, True)]
+}
+
+
+class Particle:
+    __slots__ = ["name", "x", "y", "born", "life", "start", "end", "fade"]
+
+
+class ParticlePool:
+    def __init__(self, capacity=CAPACITY):
+        self.capacity = capacity
+        self.active = list()
+        self.recycled = 0
+        self._free = [Particle() for _ in range(capacity)]
+
+    def __len__(self):
+        return len(self.active)
+
+    def emit(self, kind, x, y, now):
+        for name, delay, life, start, end, fade in EMITTERS[kind]:
+            if self._free:
+                particle = self._free.pop()
+            else:
+                # A full pool gives up its oldest particle.
+                particle = self.active.pop(0)
+                self.recycled += 1
+            particle.name = name
+            particle.x = x
+            particle.y = y
+            particle.born = now + delay
+            particle.life = life
+            particle.start = start
+            particle.end = end
+            particle.fade = fade
+            self.active.append(particle)
+
+    def update(self, now):
+        alive = list()
+        for particle in self.active:
+            if now < particle.born + particle.life:
+                alive.append(particle)
+            else:
+                self._free.append(particle)
+        self.active = alive
+
+    def clear(self):
+        self._free.extend(self.active)
+        self.active = list()
+
+    def frame(self, now):
+        # Visible particles as (name, x, y, scale, opacity), with the
+        # position in cells.
+        sprites = list()
+        for particle in self.active:
+            age = now - particle.born
+            if 0 <= age < particle.life:
+                done = age / particle.life
+                sprites.append((
+                    particle.name, particle.x, particle.y,
+                    particle.start + (particle.end - particle.start) * done,
+                    1 - done if particle.fade else 1.0))
+        return sprites
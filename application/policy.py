@@ -0,0 +1,122 @@
+from collections import deque
+import random
+
+from domain.infrastructure.geometry import Direction, Point
+
+from domain.obstacle import Wall
+from domain.enemy import Enemy
+from domain.flag import Flag
+
+
+class IdlePolicy:
+    def __init__(self, seed=None):
+        pass
+
+    def __call__(self, game):
+        return None, False
+
+
+class RandomPolicy:
+    def __init__(self, seed=None):
+        self.random = random.Random(seed)
+        self.direction = None
+        self.fire = False
+        self.hold = 0
+
+    def __call__(self, game):
+        if self.hold == 0:
+            self.direction = self.random.choice(
+                [None, Direction.Up, Direction.Down,
+                 Direction.Left, Direction.Right])
+            self.fire = self.random.randint(0, 1) == 1
+            self.hold = self.random.randint(1, 8)
+        self.hold -= 1
+        return self.direction, self.fire
+
+
+class HunterPolicy:
+    def __init__(self, seed=None):
+        pass
+
+    @staticmethod
+    def _passable(game, location):
+        for obj in game.map[location]:
+            if type(obj) in [Wall, Enemy, Flag]:
+                return False
+        return True
+
+    @staticmethod
+    def _line_of_fire(game, location, target):
+        if location.x == target.x:
+            step = 1 if target.y > location.y else -1
+            direction = Direction.Down if step > 0 else Direction.Up
+            cells = [Point(location.x, y)
+                     for y in range(location.y + step, target.y, step)]
+        elif location.y == target.y:
+            step = 1 if target.x > location.x else -1
+            direction = Direction.Right if step > 0 else Direction.Left
+            cells = [Point(x, location.y)
+                     for x in range(location.x + step, target.x, step)]
+        else:
+            return
+
+        for cell in cells:
+            if Wall in game.map.cell_types(cell):
+                return
+        return direction
+
+    def _aim(self, game, location, enemies):
+        for enemy in enemies:
+            direction = self._line_of_fire(game, location, enemy.location)
+            if direction:
+                return direction
+
+    def _path(self, game, enemies):
+        start = game.player.location
+        first_steps = {start: None}
+        queue = deque([start])
+        while queue:
+            location = queue.popleft()
+            if location != start and self._aim(game, location, enemies):
+                return first_steps[location]
+            for nxt, direction in location.neighbors():
+                if nxt in first_steps or not game.map.check_coords(nxt):
+                    continue
+                if not self._passable(game, nxt):
+                    continue
+                first_steps[nxt] = first_steps[location] or direction
+                queue.append(nxt)
+
+    @staticmethod
+    def _towards(location, target):
+        dx = target.x - location.x
+        dy = target.y - location.y
+        if abs(dx) > abs(dy):
+            return Direction.Right if dx > 0 else Direction.Left
+        return Direction.Down if dy > 0 else Direction.Up
+
+    def __call__(self, game):
+        enemies = game.map.get_enemies()
+        if not game.player.health or not enemies:
+            return None, False
+
+        direction = self._aim(game, game.player.location, enemies)
+        if direction:
+            return direction, True
+
+        direction = self._path(game, enemies)
+        if direction:
+            return direction, True
+
+        nearest = min(
+            enemies,
+            key=lambda e: (abs(e.location.x - game.player.location.x) +
+                           abs(e.location.y - game.player.location.y)))
+        return self._towards(game.player.location, nearest.location), True
+
+
+POLICIES = {
+    "idle": IdlePolicy,
+    "random": RandomPolicy,
+    "hunter": HunterPolicy
+}
@@ -0,0 +1,369 @@
+from application import sprites
+from application.particles import ParticlePool, FLASH
+
+from domain.infrastructure.geometry import Direction, Point
+from domain.obstacle import Wall
+from domain.bonus import Bonus
+from domain.bullet import Bullet
+from domain.player import Player
+from domain.terrain import Grass
+from domain.flag import Flag
+
+from PyQt5.QtGui import QPainter, QPixmap, QFont
+from PyQt5.QtCore import QRect, Qt
+
+
+# Cell contents that live in the cached layer, in drawing order.
+STATIC_TYPES = [Wall, Grass, Flag, Bonus]
+ORIGIN = 50
+VIEWPORT = 650
+HUD_SCALE = 50
+
+
+def static_sprite(obj):
+    if isinstance(obj, Wall):
+        return sprites.WALLS[obj.wall_type]
+    elif isinstance(obj, Grass):
+        return "terrain"
+    elif isinstance(obj, Flag):
+        return "flag"
+    return sprites.BONUSES[obj.type]
+
+
+class Camera:
+    def __init__(self, width=VIEWPORT, height=VIEWPORT):
+        self.width = width
+        self.height = height
+        self.x = 0
+        self.y = 0
+
+    def follow(self, x, y, world):
+        # Centre on the point without looking past the map edges.
+        self.x = min(max(x - self.width // 2, 0), max(world - self.width, 0))
+        self.y = min(max(y - self.height // 2, 0),
+                     max(world - self.height, 0))
+
+    def window(self, scale, size):
+        return (self.x // scale, self.y // scale,
+                min((self.x + self.width - 1) // scale + 1, size),
+                min((self.y + self.height - 1) // scale + 1, size))
+
+    def sees(self, x, y, side):
+        return (x + side > self.x and x < self.x + self.width
+                and y + side > self.y and y < self.y + self.height)
+
+
+class Renderer:
+    def __init__(self, scale=50, camera=None):
+        self.scale = scale
+        self.sprites = sprites.load_atlas(scale)
+        self.hud = sprites.load_atlas(HUD_SCALE)
+        self.camera = camera or Camera()
+        self.particles = ParticlePool()
+        self.layer = None
+        self.cells_drawn = 0
+        self._map = None
+        self._window = None
+        self._changes = None
+        self._cells = dict()
+        self._previous = dict()
+        self._painted = None
+        self._emitted = None
+        self._bullets = set()
+        self._painted_particles = None
+
+    def set_scale(self, scale):
+        self.scale = scale
+        self.sprites = sprites.load_atlas(scale)
+        self._window = None
+        self._previous = dict()
+        self._painted = None
+        self._painted_particles = None
+
+    def viewport(self):
+        return QRect(ORIGIN, ORIGIN, self.camera.width, self.camera.height)
+
+    def changed(self, game, alpha=1.0):
+        self.emit(game)
+        return (self.layer_stale(game)
+                or self.moving_sprites(game, alpha) != self._painted
+                or self.particles.frame(game.clock.ticks + alpha)
+                != self._painted_particles)
+
+    def paint(self, painter, game, alpha=1.0):
+        self.emit(game)
+        frame = self._blend(game, alpha)
+        for obj, _, x, y in frame:
+            if obj is game.player:
+                half = self.scale // 2
+                self.camera.follow(x + half, y + half,
+                                   game.map.size * self.scale)
+        self.update_layer(game)
+        self._painted = [(name, x, y) for _, name, x, y in frame]
+
+        camera = self.camera
+        painter.save()
+        painter.setClipRect(ORIGIN, ORIGIN, camera.width, camera.height)
+        self.sprites.draw_batch(painter, (
+            (name, ORIGIN + x - camera.x, ORIGIN + y - camera.y)
+            for name, x, y in self._painted
+            if camera.sees(x, y, self.scale)))
+        # Grass and walls cover tanks, so the layer goes on top.
+        left, top = self._window[:2]
+        painter.drawPixmap(ORIGIN + left * self.scale - camera.x,
+                           ORIGIN + top * self.scale - camera.y, self.layer)
+        # Explosions and flashes cover everything.
+        self._painted_particles = self.particles.frame(
+            game.clock.ticks + alpha)
+        self.sprites.draw_batch(painter, (
+            (name, ORIGIN + x - camera.x, ORIGIN + y - camera.y, size, opacity)
+            for name, x, y, size, opacity in self._particle_sprites()
+            if camera.sees(x, y, self.scale)))
+        painter.restore()
+
+    # region(Static layer)
+    def layer_stale(self, game):
+        game_map = game.map
+        if game_map is not self._map or self._changes:
+            return True
+        return self.camera.window(self.scale, game_map.size) != self._window
+
+    def update_layer(self, game):
+        game_map = game.map
+        window = self.camera.window(self.scale, game_map.size)
+        if game_map is not self._map or window != self._window:
+            self._rebuild(game_map, window)
+            return
+
+        dirty = set(self._changes)
+        self._changes.clear()
+        if not dirty:
+            return
+
+        left, top, right, bottom = window
+        cells = list()
+        for location in dirty:
+            if not (left <= location.x < right and top <= location.y < bottom):
+                continue
+            names = self._static_names(game_map, location)
+            if names != self._cells.get(location, ()):
+                cells.append((location, names))
+        if cells:
+            painter = QPainter(self.layer)
+            self._draw_cells(painter, cells)
+            painter.end()
+
+    def _rebuild(self, game_map, window):
+        if game_map is not self._map:
+            if self._map is not None:
+                self._map.untrack_changes(self._changes)
+                self.particles.clear()
+            self._map = game_map
+            self._changes = game_map.track_changes()
+        self._changes.clear()
+        self._window = window
+        self._cells = dict()
+
+        left, top, right, bottom = window
+        self.layer = QPixmap((right - left) * self.scale,
+                             (bottom - top) * self.scale)
+        self.layer.fill(Qt.transparent)
+        cells = list()
+        for x in range(left, right):
+            for y in range(top, bottom):
+                location = Point(x, y)
+                names = self._static_names(game_map, location)
+                if names:
+                    cells.append((location, names))
+        painter = QPainter(self.layer)
+        self._draw_cells(painter, cells)
+        painter.end()
+
+    def _static_names(self, game_map, location):
+        cell = game_map.objects_at(location)
+        return tuple(
+            static_sprite(obj)
+            for _type in STATIC_TYPES
+            for obj in cell if type(obj) is _type)
+
+    def _draw_cells(self, painter, cells):
+        # Clear every cell first, then draw all of them in one batch.
+        batch = list()
+        painter.setCompositionMode(QPainter.CompositionMode_Source)
+        for location, names in cells:
+            x = (location.x - self._window[0]) * self.scale
+            y = (location.y - self._window[1]) * self.scale
+            painter.fillRect(x, y, self.scale, self.scale, Qt.transparent)
+            batch.extend((name, x, y) for name in names)
+            if names:
+                self._cells[location] = names
+            else:
+                self._cells.pop(location, None)
+        painter.setCompositionMode(QPainter.CompositionMode_SourceOver)
+        self.sprites.draw_batch(painter, batch)
+        self.cells_drawn += len(cells)
+    # endregion
+
+    # region(Particles)
+    def emit(self, game):
+        # Booms are reported for one tick, so this runs before every
+        # simulation step as well as before painting.
+        ticks = game.clock.ticks
+        if ticks == self._emitted:
+            return
+        first = self._emitted is None
+        self._emitted = ticks
+        for boom in game.booms:
+            self.particles.emit(
+                boom.type, boom.location.x, boom.location.y, ticks)
+
+        bullets = set()
+        for obj, name, x, y in self._moving(game):
+            if not isinstance(obj, Bullet):
+                continue
+            bullets.add(obj)
+            if not first and obj not in self._bullets:
+                # Flash around the bullet's first position.
+                centre = self.sprites.side(name) / 2
+                self.particles.emit(FLASH, (x + centre) / self.scale - 0.5,
+                                    (y + centre) / self.scale - 0.5, ticks)
+        self._bullets = bullets
+        self.particles.update(ticks)
+
+    def _particle_sprites(self):
+        return [(name, round(x * self.scale), round(y * self.scale),
+                 size, opacity)
+                for name, x, y, size, opacity in self._painted_particles]
+    # endregion
+
+    # region(Moving objects)
+    def capture(self, game):
+        # Called before every simulation step, so frames drawn until
+        # the next one can blend from these positions to the new ones.
+        self.emit(game)
+        self._previous = {
+            obj: (x, y) for obj, _, x, y in self._moving(game)}
+
+    def moving_sprites(self, game, alpha=1.0):
+        return [(name, x, y) for _, name, x, y in self._blend(game, alpha)]
+
+    def _blend(self, game, alpha):
+        frame = list()
+        for obj, name, x, y in self._moving(game):
+            previous = self._previous.get(obj)
+            # Anything that spawned or jumped further than a cell snaps.
+            if (previous and abs(x - previous[0]) <= self.scale
+                    and abs(y - previous[1]) <= self.scale):
+                x = round(previous[0] + (x - previous[0]) * alpha)
+                y = round(previous[1] + (y - previous[1]) * alpha)
+            frame.append((obj, name, x, y))
+        return frame
+
+    def _moving(self, game):
+        if game.player.health:
+            yield self._player(game)
+            for bullet in game.player.bullets:
+                yield self._bullet(game, bullet)
+
+        enemies = game.map.get_enemies()
+        for enemy in enemies:
+            for bullet in enemy.bullets:
+                yield self._bullet(game, bullet)
+        for enemy in enemies:
+            yield self._enemy(game, enemy)
+
+    def _player(self, game):
+        dx = (-game.player.velocity.x +
+              (game.count % game.player_speed) *
+              game.player.velocity.x / game.player_speed)
+
+        dy = (-game.player.velocity.y +
+              (game.count % game.player_speed) *
+              game.player.velocity.y / game.player_speed)
+
+        name = sprites.PLAYER[game.player.direction][game.player.cheat]
+        return (game.player, name,
+                int((game.player.location.x + dx) * self.scale),
+                int((game.player.location.y + dy) * self.scale))
+
+    def _enemy(self, game, enemy):
+        dx = (-enemy.velocity.x + game.count *
+              enemy.velocity.x / game.game_speed)
+        dy = (-enemy.velocity.y + game.count *
+              enemy.velocity.y / game.game_speed)
+
+        return (enemy, sprites.ENEMIES[enemy.type][enemy.direction],
+                int((enemy.location.x + dx) * self.scale),
+                int((enemy.location.y + dy) * self.scale))
+
+    def _bullet(self, game, bullet):
+        name = sprites.BULLETS[bullet.bullet_type][bullet.direction]
+        bullet_size = self.sprites.side(name)
+
+        speed = game.player_bullet_speed \
+            if isinstance(bullet.parent, Player) \
+            else game.enemy_bullet_speed
+
+        dx_velocity = (-bullet.velocity.x +
+                       (game.count % speed)
+                       * bullet.velocity.x / speed)
+
+        dy_velocity = (-bullet.velocity.y +
+                       (game.count % speed)
+                       * bullet.velocity.y / speed)
+
+        dx_gun = {
+            Direction.Up: self.scale / 2 - bullet_size / 2,
+            Direction.Down: self.scale / 2 - bullet_size / 2,
+            Direction.Left: -bullet_size,
+            Direction.Right: self.scale
+        }
+
+        dy_gun = {
+            Direction.Up: -bullet_size,
+            Direction.Down: self.scale,
+            Direction.Left: self.scale / 2 - bullet_size / 2,
+            Direction.Right: self.scale / 2 - bullet_size / 2
+        }
+
+        return (bullet, name,
+                (int((bullet.location.x + dx_velocity) * self.scale)
+                 + int(dx_gun[bullet.direction])),
+                (int((bullet.location.y + dy_velocity) * self.scale)
+                 + int(dy_gun[bullet.direction])))
+    # endregion
+
+    def hud_state(self, game, levels_count):
+        player = game.player
+        return (game.score, game.level_num, levels_count, player.health,
+                bool(player.invulnerability), bool(player.armor),
+                game.spawn_count_haunting, game.spawn_count_patrolling)
+
+    def draw_level_info(self, painter, game, levels_count):
+        painter.setPen(Qt.darkRed)
+        painter.setFont(QFont('Decorative', 14))
+        painter.drawText(720, 690, f"SCORES: {game.score}")
+
+        painter.drawText(
+            720, 540,
+            f"LEVEL: {game.level_num}/{levels_count}")
+
+        if game.player.invulnerability:
+            self.hud.draw(painter, "infinity", 750, 450)
+        elif game.player.armor:
+            self.hud.draw(painter, "armor", 750, 450)
+
+        painter.drawText(720, 600, f"HEALTH:")
+        painter.drawText(720, 70, f"SPAWNS:")
+        icons = [("heart", 720 + i * 40, 620)
+                 for i in range(game.player.health)]
+        icons += [("enemy1_up_spawn", 720, 90 + i * 60)
+                  for i in range(game.spawn_count_haunting)]
+        icons += [("enemy_up_spawn", 780, 90 + i * 60)
+                  for i in range(game.spawn_count_patrolling)]
+        self.hud.draw_batch(painter, icons)
+
+        painter.setFont(QFont('Decorative', 10))
+        painter.drawText(50, 730, "Default: Ctrl+J")
+        painter.drawText(200, 730, "Double-gun: Ctrl+K")
+        painter.drawText(400, 730, "Quad-gun: Ctrl+L")
@@ -0,0 +1,241 @@
+from application.game import Game, GameStatus
+from application.level import create_level
+from application.save import dump
+
+from domain.infrastructure.geometry import Direction
+
+import argparse
+import struct
+import time
+import zlib
+
+
+MAGIC = b"BCRP"
+VERSION = 3
+
+HEADER = struct.Struct("<4sHHqH")
+SEED = struct.Struct("<q")
+HASH = struct.Struct("<I")
+
+# Record kinds
+INPUT = 0
+STATE = 1
+END = 2
+
+DIRECTIONS = [None] + list(Direction)
+
+
+class ReplayError(Exception):
+    pass
+
+
+class ReplayDivergence(ReplayError):
+    def __init__(self, tick, expected, actual):
+        super().__init__(
+            f"State diverged at tick {tick}: "
+            f"expected {expected:08x}, got {actual:08x}")
+        self.tick = tick
+        self.expected = expected
+        self.actual = actual
+
+
+def state_hash(game):
+    return zlib.crc32(dump(game))
+
+
+def encode_input(direction, fire, cheat=0):
+    return DIRECTIONS.index(direction) | bool(fire) << 3 | cheat << 4
+
+
+def decode_input(code):
+    return DIRECTIONS[code & 7], bool(code & 8), code >> 4
+
+
+def _write_varint(buffer, value):
+    while value >= 0x80:
+        buffer.append(value & 0x7f | 0x80)
+        value >>= 7
+    buffer.append(value)
+
+
+def _read_varint(data, offset):
+    value = shift = 0
+    while True:
+        byte = data[offset]
+        offset += 1
+        value |= (byte & 0x7f) << shift
+        if byte < 0x80:
+            return value, offset
+        shift += 7
+
+
+class Replay:
+    def __init__(self, size, seed, seeds, records=None):
+        self.size = size
+        self.seed = seed
+        self.seeds = list(seeds)
+        self.records = records if records is not None else list()
+
+    @property
+    def ticks(self):
+        return self.records[-1][1] if self.records else 0
+
+    def dumps(self):
+        stream = bytearray()
+        tick = 0
+        for kind, record_tick, value in self.records:
+            stream.append(kind)
+            _write_varint(stream, record_tick - tick)
+            tick = record_tick
+            if kind == INPUT:
+                stream.append(value)
+            elif kind == STATE:
+                stream += HASH.pack(value)
+
+        chunks = [HEADER.pack(MAGIC, VERSION, self.size,
+                              self.seed, len(self.seeds))]
+        chunks.extend(SEED.pack(seed) for seed in self.seeds)
+        chunks.append(zlib.compress(bytes(stream), 9))
+        return b"".join(chunks)
+
+    @classmethod
+    def loads(cls, data):
+        magic, version, size, seed, count = HEADER.unpack_from(data)
+        if magic != MAGIC:
+            raise ReplayError("Not a Battle City replay")
+        if version != VERSION:
+            raise ReplayError(f"Unsupported replay version {version}")
+        offset = HEADER.size
+        seeds = list()
+        for _ in range(count):
+            seeds.append(SEED.unpack_from(data, offset)[0])
+            offset += SEED.size
+
+        stream = zlib.decompress(data[offset:])
+        records = list()
+        offset = tick = 0
+        while offset < len(stream):
+            kind = stream[offset]
+            delta, offset = _read_varint(stream, offset + 1)
+            tick += delta
+            value = None
+            if kind == INPUT:
+                value = stream[offset]
+                offset += 1
+            elif kind == STATE:
+                value, = HASH.unpack_from(stream, offset)
+                offset += HASH.size
+            records.append((kind, tick, value))
+        return cls(size, seed, seeds, records)
+
+    def save(self, path):
+        with open(path, "wb") as file:
+            file.write(self.dumps())
+
+    @classmethod
+    def load(cls, path):
+        with open(path, "rb") as file:
+            return cls.loads(file.read())
+
+
+class ReplayRecorder:
+    def __init__(self, game, seeds, hash_interval=1):
+        if game.clock.ticks:
+            raise ReplayError("Recording must start with a fresh game")
+        self.replay = Replay(game.size, game.seed, seeds)
+        self.hash_interval = hash_interval
+        self.ticks = 0
+        self._input = None
+        self._updates = 0
+
+    def __call__(self, game):
+        self.record(game)
+
+    def record(self, game):
+        records = self.replay.records
+        code = encode_input(*game.last_input, game.player.cheat)
+        if code != self._input:
+            # Inputs apply from the first tick after the previous
+            # update, since headless runs skip idle ticks with them.
+            records.append((INPUT, self.ticks + 1, code))
+            self._input = code
+
+        self.ticks = game.clock.ticks
+        self._updates += 1
+        if self._updates % self.hash_interval == 0:
+            records.append((STATE, self.ticks, state_hash(game)))
+
+    def finish(self):
+        records = self.replay.records
+        if not records or records[-1][0] != END:
+            records.append((END, self.ticks, None))
+        return self.replay
+
+    def save(self, path):
+        self.finish().save(path)
+
+
+def _start_pending_level(game, levels):
+    if game.status == GameStatus.NextLevel:
+        game.start(levels[game.level_num - 1])
+
+
+def _advance(game, levels, tick, direction, fire):
+    while game.clock.ticks < tick:
+        _start_pending_level(game, levels)
+        if game.status != GameStatus.Process:
+            break
+        game.fast_forward(tick - game.clock.ticks, direction, fire)
+
+
+def play(replay, verify=True):
+    game = Game(size=replay.size, seed=replay.seed)
+    levels = [create_level(replay.size, seed) for seed in replay.seeds]
+    game.levels_count = len(levels)
+    game.start(levels[0])
+
+    direction, fire = None, False
+    for kind, tick, value in replay.records:
+        if kind == INPUT:
+            _advance(game, levels, tick - 1, direction, fire)
+            _start_pending_level(game, levels)
+            direction, fire, game.player.cheat = decode_input(value)
+        else:
+            _advance(game, levels, tick, direction, fire)
+            if kind == STATE and verify:
+                actual = state_hash(game)
+                if actual != value:
+                    raise ReplayDivergence(tick, value, actual)
+    return game
+
+
+def create_parser():
+    parser = argparse.ArgumentParser(
+        description="Re-simulate a Battle City replay headless")
+    parser.add_argument("path", help="replay file")
+    parser.add_argument("--no-verify", action="store_true",
+                        help="skip state hash checks")
+    return parser
+
+
+def main():
+    args = create_parser().parse_args()
+    replay = Replay.load(args.path)
+    started = time.perf_counter()
+    try:
+        game = play(replay, verify=not args.no_verify)
+    except ReplayDivergence as err:
+        print(err)
+        return 1
+    elapsed = time.perf_counter() - started
+
+    print(f"{replay.ticks} ticks, level {game.level_num}, "
+          f"score {game.score}, status {game.status.name}")
+    seconds = replay.ticks * game.clock.tick.total_seconds()
+    print(f"replayed in {elapsed:.3f} s "
+          f"({seconds / max(elapsed, 1e-9):.0f}x real time)")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
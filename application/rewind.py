@@ -0,0 +1,253 @@
+from application.save import (
+    HEADER, RNG, COUNT, pack_prefix, pack_header, pack_rng,
+    pack_grid, pack_entities, cell_code, load)
+
+from collections import deque
+import struct
+
+
+# Sections present in a delta frame
+HAS_HEADER = 1
+HAS_RNG = 2
+HAS_ENTITIES = 4
+
+FLAGS = struct.Struct("<B")
+RNG_DELTA = struct.Struct("<HBd")
+WORD = struct.Struct("<HI")
+CELL = struct.Struct("<IB")
+ENTITY_DELTA = struct.Struct("<II")
+RUN = struct.Struct("<II")
+
+BLOCK = 32
+
+
+def diff_runs(old, new):
+    # Byte ranges of new that differ from old, as (offset, bytes). Equal
+    # stretches shorter than a run header are copied along.
+    runs = list()
+    start = end = None
+    for block in range(0, len(new), BLOCK):
+        if old[block:block + BLOCK] == new[block:block + BLOCK]:
+            continue
+        for offset in range(block, min(block + BLOCK, len(new))):
+            if offset < len(old) and old[offset] == new[offset]:
+                continue
+            if start is not None and offset - end < RUN.size:
+                end = offset + 1
+                continue
+            if start is not None:
+                runs.append((start, new[start:end]))
+            start, end = offset, offset + 1
+    if start is not None:
+        runs.append((start, new[start:end]))
+    return runs
+
+
+class RewindBuffer:
+    def __init__(self, seconds=10, keyframe_interval=100, max_bytes=None):
+        self.seconds = seconds
+        self.keyframe_interval = keyframe_interval
+        # Frame data held, never above max_bytes unless a single
+        # keyframe is larger.
+        self.max_bytes = max_bytes
+        self.bytes = 0
+        self._segments = deque()
+        self._tick = None
+        self._map = None
+        self._changes = None
+        self._grid = None
+        self._header = None
+        self._words = None
+        self._gauss = None
+        self._entities = None
+
+    def __call__(self, game):
+        self.record(game)
+
+    def __len__(self):
+        return sum(len(segment) for segment in self._segments)
+
+    def record(self, game):
+        self._tick = game.clock.tick
+        ticks = game.clock.ticks
+        header = pack_header(game)
+        version, words, gauss = game.random.getstate()
+        entities = pack_entities(game)
+
+        data = None
+        if (game.map is self._map and self._segments
+                and len(self._segments[-1]) < self.keyframe_interval):
+            data = self._delta(game, header, words, gauss, entities)
+            if self.max_bytes is not None:
+                self._evict(ticks, len(data))
+                if self.bytes + len(data) > self.max_bytes:
+                    # The newest segment alone is over the limit, so a
+                    # new keyframe lets it go.
+                    data = None
+        if data is None:
+            data = self._keyframe(game, header, words, gauss, entities)
+            self._segments.append([])
+
+        self._segments[-1].append((ticks, data))
+        self.bytes += len(data)
+        self._header = header
+        self._words = words
+        self._gauss = gauss
+        self._entities = entities
+        self._evict(ticks)
+
+    def _keyframe(self, game, header, words, gauss, entities):
+        if game.map is not self._map:
+            if self._map is not None:
+                self._map.untrack_changes(self._changes)
+            self._map = game.map
+            self._changes = game.map.track_changes()
+        self._changes.clear()
+        self._grid = bytearray(pack_grid(game))
+        return b"".join([
+            header, pack_rng((3, words, gauss)), bytes(self._grid), entities
+        ])
+
+    def _delta(self, game, header, words, gauss, entities):
+        flags = 0
+        chunks = [b""]
+
+        if header != self._header:
+            flags |= HAS_HEADER
+            chunks.append(header)
+
+        if words != self._words or gauss != self._gauss:
+            flags |= HAS_RNG
+            changed = [
+                (index, word)
+                for index, (word, previous)
+                in enumerate(zip(words, self._words))
+                if word != previous
+            ]
+            chunks.append(RNG_DELTA.pack(
+                len(changed), gauss is not None, gauss or 0.0))
+            chunks.extend(WORD.pack(index, word) for index, word in changed)
+
+        cells = list()
+        width = game.size
+        for location in self._changes:
+            index = location.y * width + location.x
+            code = cell_code(game.map[location])
+            if self._grid[index] != code:
+                self._grid[index] = code
+                cells.append(CELL.pack(index, code))
+        self._changes.clear()
+        chunks.append(COUNT.pack(len(cells)))
+        chunks.extend(cells)
+
+        if entities != self._entities:
+            flags |= HAS_ENTITIES
+            runs = diff_runs(self._entities, entities)
+            chunks.append(ENTITY_DELTA.pack(len(entities), len(runs)))
+            for offset, run in runs:
+                chunks.append(RUN.pack(offset, len(run)))
+                chunks.append(run)
+
+        chunks[0] = FLAGS.pack(flags)
+        return b"".join(chunks)
+
+    def _evict(self, tick, extra=0):
+        window = self.seconds / self._tick.total_seconds()
+        while len(self._segments) > 1:
+            over_time = tick - self._segments[1][0][0] >= window
+            over_bytes = (self.max_bytes is not None
+                          and self.bytes + extra > self.max_bytes)
+            if not over_time and not over_bytes:
+                break
+            segment = self._segments.popleft()
+            self.bytes -= sum(len(data) for _, data in segment)
+
+    def available(self):
+        if not self._segments:
+            return 0
+        oldest = self._segments[0][0][0]
+        newest = self._segments[-1][-1][0]
+        return (newest - oldest) * self._tick.total_seconds()
+
+    def restore(self, seconds):
+        if not self._segments:
+            return None
+
+        newest = self._segments[-1][-1][0]
+        target = newest - int(round(seconds / self._tick.total_seconds()))
+
+        index = len(self._segments) - 1
+        while index > 0 and self._segments[index][0][0] > target:
+            index -= 1
+        segment = self._segments[index]
+
+        tick, data = segment[0]
+        header = data[:HEADER.size]
+        size = HEADER.unpack_from(header)[0]
+        offset = HEADER.size
+        *words, has_gauss, gauss = RNG.unpack_from(data, offset)
+        gauss = gauss if has_gauss else None
+        offset += RNG.size
+        grid = bytearray(data[offset:offset + size * size])
+        entities = bytearray(data[offset + size * size:])
+
+        position = 0
+        for position in range(1, len(segment)):
+            tick, data = segment[position]
+            if tick > target:
+                position -= 1
+                break
+            header, gauss = self._apply(
+                data, header, words, gauss, grid, entities)
+
+        while len(self._segments) > index + 1:
+            dropped = self._segments.pop()
+            self.bytes -= sum(len(data) for _, data in dropped)
+        self.bytes -= sum(len(data) for _, data in segment[position + 1:])
+        del segment[position + 1:]
+        if self._map is not None:
+            self._map.untrack_changes(self._changes)
+        self._map = None
+
+        return load(b"".join([
+            pack_prefix(), header,
+            pack_rng((3, tuple(words), gauss)),
+            bytes(grid), bytes(entities)
+        ]))
+
+    def _apply(self, data, header, words, gauss, grid, entities):
+        # Applies one delta frame; words, grid and entities change in
+        # place.
+        flags, = FLAGS.unpack_from(data)
+        offset = FLAGS.size
+        if flags & HAS_HEADER:
+            header = data[offset:offset + HEADER.size]
+            offset += HEADER.size
+
+        if flags & HAS_RNG:
+            count, has_gauss, gauss = RNG_DELTA.unpack_from(data, offset)
+            gauss = gauss if has_gauss else None
+            offset += RNG_DELTA.size
+            for _ in range(count):
+                word_index, word = WORD.unpack_from(data, offset)
+                words[word_index] = word
+                offset += WORD.size
+
+        count, = COUNT.unpack_from(data, offset)
+        offset += COUNT.size
+        for _ in range(count):
+            cell_index, code = CELL.unpack_from(data, offset)
+            grid[cell_index] = code
+            offset += CELL.size
+
+        if flags & HAS_ENTITIES:
+            length, count = ENTITY_DELTA.unpack_from(data, offset)
+            offset += ENTITY_DELTA.size
+            del entities[length:]
+            entities.extend(bytes(length - len(entities)))
+            for _ in range(count):
+                start, run = RUN.unpack_from(data, offset)
+                offset += RUN.size
+                entities[start:start + run] = data[offset:offset + run]
+                offset += run
+        return header, gauss
@@ -0,0 +1,420 @@
+from application.game import Game, GameStatus
+from application.level import Level
+
+from domain.infrastructure.geometry import Point, Direction
+from domain.obstacle import Wall, WallType
+from domain.enemy import Enemy, EnemyType
+from domain.bullet import Bullet, BulletType
+from domain.bonus import Bonus, BonusType
+from domain.boom import BoomType
+from domain.terrain import Grass
+from domain.player import Player
+from domain.flag import Flag
+from domain.map import Map
+
+from threading import Thread, Lock
+from queue import Queue
+import datetime
+import struct
+import os
+
+
+MAGIC = b"BCSV"
+VERSION = 2
+
+PREFIX = struct.Struct("<4sH")
+HEADER = struct.Struct("<HHHIIIHHBHqqq")
+RNG = struct.Struct("<625IBd")
+COUNT = struct.Struct("<I")
+TANK = struct.Struct("<BBHHBBBbbqqB")
+PLAYER = struct.Struct("<BBqqq")
+ENEMY = struct.Struct("<BHH")
+BULLET = struct.Struct("<IHHBBbbB")
+BONUS = struct.Struct("<HHBI")
+
+NONE_TIME = -2 ** 63
+
+# Grid cell codes
+EMPTY = 0
+BRICK = 1
+CONCRETE = 2
+GRASS = 3
+FLAG = 4
+
+# Tank record kinds
+PLAYER_KIND = 1
+ENEMY_KIND = 2
+
+DIRECTIONS = list(Direction)
+ENEMY_TYPES = list(EnemyType)
+BULLET_TYPES = list(BulletType)
+BONUS_TYPES = list(BonusType)
+BOOM_TYPES = list(BoomType)
+STATUSES = [None] + list(GameStatus)
+
+
+class SaveError(Exception):
+    pass
+
+
+def _time(clock, moment):
+    if moment is None:
+        return NONE_TIME
+    return (moment - clock.epoch) // datetime.timedelta(microseconds=1)
+
+
+def _moment(clock, value):
+    if value == NONE_TIME:
+        return None
+    return clock.epoch + datetime.timedelta(microseconds=value)
+
+
+def _delay(delay):
+    return delay // datetime.timedelta(microseconds=1)
+
+
+def pack_header(game):
+    seed = getattr(game.level, "seed", None)
+    return HEADER.pack(
+        game.size, game.level_num, game.levels_count,
+        game.score, game.kills, game.bonus_count,
+        game.spawn_count_haunting, game.spawn_count_patrolling,
+        STATUSES.index(game.status), game.count,
+        game.clock.ticks, seed if isinstance(seed, int) else -1,
+        _delay(game.clock.tick))
+
+
+def pack_rng(state):
+    version, words, gauss = state
+    return RNG.pack(*words, gauss is not None, gauss or 0.0)
+
+
+def _code(obj):
+    if isinstance(obj, Wall):
+        return BRICK if obj.wall_type == WallType.Brick else CONCRETE
+    elif isinstance(obj, Grass):
+        return GRASS
+    elif isinstance(obj, Flag):
+        return FLAG
+    return EMPTY
+
+
+def cell_code(cell):
+    for obj in cell:
+        code = _code(obj)
+        if code != EMPTY:
+            return code
+    return EMPTY
+
+
+def pack_grid(game):
+    grid = bytearray(game.size * game.size)
+    for obj in game.map.get_objects(Wall, Grass, Flag):
+        grid[obj.location.y * game.size + obj.location.x] = _code(obj)
+    return bytes(grid)
+
+
+def pack_prefix():
+    return PREFIX.pack(MAGIC, VERSION)
+
+
+def _pack_tank(game, tank, kind, placed):
+    return TANK.pack(
+        kind, placed, tank.location.x, tank.location.y,
+        DIRECTIONS.index(tank.direction), tank.health, tank.level,
+        tank.velocity.x, tank.velocity.y,
+        _time(game.clock, tank.last_shoot), _delay(tank.shoot_delay),
+        len(tank.bullets))
+
+
+def _pack_bullets(game, tank, parent):
+    chunks = list()
+    bullets = sorted(
+        tank.bullets,
+        key=lambda b: (b.location.x, b.location.y,
+                       DIRECTIONS.index(b.direction)))
+    for bullet in bullets:
+        placed = bullet in game.map[bullet.location]
+        chunks.append(BULLET.pack(
+            parent, bullet.location.x, bullet.location.y,
+            DIRECTIONS.index(bullet.direction),
+            BULLET_TYPES.index(bullet.bullet_type),
+            bullet.velocity.x, bullet.velocity.y, placed))
+    return chunks
+
+
+def pack_entities(game):
+    tanks = [(game.player, PLAYER_KIND,
+              game.player in game.map[game.player.location])]
+    enemies = game.map.get_enemies()
+    tanks.extend((enemy, ENEMY_KIND, True) for enemy in enemies)
+    parents = dict.fromkeys(
+        bullet.parent for bullet in game.map.get_objects(Bullet))
+    tanks.extend((parent, ENEMY_KIND, False)
+                 for parent in parents
+                 if isinstance(parent, Enemy) and parent not in enemies)
+
+    chunks = [COUNT.pack(len(tanks))]
+    for index, (tank, kind, placed) in enumerate(tanks):
+        chunks.append(_pack_tank(game, tank, kind, placed))
+        if kind == PLAYER_KIND:
+            chunks.append(PLAYER.pack(
+                tank.cheat, tank.armor,
+                _time(game.clock, tank.invulnerability),
+                _time(game.clock, tank.speed_runner),
+                _time(game.clock, tank.fast_shooting)))
+        else:
+            chunks.append(ENEMY.pack(
+                ENEMY_TYPES.index(tank.type), tank.shoot_count,
+                len(tank.directions)))
+            chunks.append(bytes(
+                DIRECTIONS.index(d) for d in tank.directions))
+        chunks.extend(_pack_bullets(game, tank, index))
+
+    bonuses = game.map.get_bonuses()
+    chunks.append(COUNT.pack(len(bonuses)))
+    for bonus in bonuses:
+        chunks.append(BONUS.pack(
+            bonus.location.x, bonus.location.y,
+            BONUS_TYPES.index(bonus.type), bonus.exists))
+    return b"".join(chunks)
+
+
+def dump(game):
+    return b"".join([
+        pack_prefix(),
+        pack_header(game),
+        pack_rng(game.random.getstate()),
+        pack_grid(game),
+        pack_entities(game)
+    ])
+
+
+class _Reader:
+    def __init__(self, data):
+        self.data = memoryview(data)
+        self.offset = 0
+
+    def read(self, layout):
+        values = layout.unpack_from(self.data, self.offset)
+        self.offset += layout.size
+        return values
+
+    def read_bytes(self, count):
+        chunk = bytes(self.data[self.offset:self.offset + count])
+        self.offset += count
+        return chunk
+
+
+def _load_grid(game, grid):
+    size = game.size
+    for index, code in enumerate(grid):
+        if code == EMPTY:
+            continue
+        location = Point(index % size, index // size)
+        if code == BRICK:
+            obj = Wall(location, WallType.Brick)
+        elif code == CONCRETE:
+            obj = Wall(location, WallType.Concrete)
+        elif code == GRASS:
+            obj = Grass(location)
+        else:
+            obj = Flag(location)
+        game.map[location].add(obj)
+
+
+def _load_tank(game, reader):
+    (kind, placed, x, y, direction, health, level, vx, vy,
+     last_shoot, shoot_delay, bullets) = reader.read(TANK)
+    location = Point(x, y)
+    delay = datetime.timedelta(microseconds=shoot_delay)
+
+    if kind == PLAYER_KIND:
+        tank = Player(location, DIRECTIONS[direction], health,
+                      clock=game.clock)
+        (tank.cheat, armor, invulnerability,
+         speed_runner, fast_shooting) = reader.read(PLAYER)
+        tank.armor = bool(armor)
+        tank.invulnerability = _moment(game.clock, invulnerability)
+        tank.speed_runner = _moment(game.clock, speed_runner)
+        tank.fast_shooting = _moment(game.clock, fast_shooting)
+        game.player = tank
+    else:
+        _type, shoot_count, directions = reader.read(ENEMY)
+        tank = Enemy(ENEMY_TYPES[_type], location,
+                     DIRECTIONS[direction], health, clock=game.clock)
+        tank.shoot_count = shoot_count
+        tank.directions = [
+            DIRECTIONS[d] for d in reader.read_bytes(directions)]
+
+    tank.level = level
+    tank.velocity = Point(vx, vy)
+    tank.last_shoot = _moment(game.clock, last_shoot)
+    tank.shoot_delay = delay
+    if placed:
+        game.map[location].add(tank)
+
+    for _ in range(bullets):
+        (_, bx, by, direction, bullet_type,
+         vx, vy, placed) = reader.read(BULLET)
+        bullet = Bullet(Point(bx, by), DIRECTIONS[direction],
+                        tank, BULLET_TYPES[bullet_type])
+        bullet.velocity = Point(vx, vy)
+        tank.bullets.add(bullet)
+        if placed:
+            game.map[bullet.location].add(bullet)
+
+
+def load(data):
+    try:
+        return _load(data)
+    except (struct.error, ValueError, IndexError, KeyError) as err:
+        raise SaveError(f"Damaged save: {err}")
+
+
+def _load(data):
+    reader = _Reader(data)
+    magic, version = reader.read(PREFIX)
+    if magic != MAGIC:
+        raise SaveError("Not a Battle City save")
+    if version != VERSION:
+        raise SaveError(f"Unsupported save version {version}")
+
+    (size, level_num, levels_count, score, kills, bonus_count,
+     spawn_haunting, spawn_patrolling, status, count,
+     ticks, seed, tick) = reader.read(HEADER)
+    rng = reader.read(RNG)
+
+    game = Game(size=size)
+    game.level = Level(size, seed if seed >= 0 else 0)
+    game.level_num = level_num
+    game.levels_count = levels_count
+    game.score = score
+    game.kills = kills
+    game.bonus_count = bonus_count
+    game.spawn_count_haunting = spawn_haunting
+    game.spawn_count_patrolling = spawn_patrolling
+    game.status = STATUSES[status]
+    game.count = count
+    game.clock.ticks = ticks
+    game.clock.tick = datetime.timedelta(microseconds=tick)
+
+    game.map = Map(size)
+    _load_grid(game, reader.read_bytes(size * size))
+
+    tanks, = reader.read(COUNT)
+    for _ in range(tanks):
+        _load_tank(game, reader)
+
+    bonuses, = reader.read(COUNT)
+    for _ in range(bonuses):
+        x, y, _type, exists = reader.read(BONUS)
+        location = Point(x, y)
+        game.map[location].add(Bonus(location, BONUS_TYPES[_type], exists))
+
+    gauss = rng[626] if rng[625] else None
+    game.random.setstate((3, tuple(rng[:625]), gauss))
+    return game
+
+
+class SaveSlots:
+    def __init__(self, directory, slots=3):
+        self.directory = directory
+        self.slots = slots
+        self._pending = dict()
+        self._last = None
+        self._lock = Lock()
+        self._queue = Queue()
+        self._worker = Thread(target=self._write_loop, daemon=True)
+        self._worker.start()
+
+    def path(self, slot):
+        return os.path.join(self.directory, f"slot_{slot}.bcs")
+
+    def save(self, slot, game):
+        data = dump(game)
+        with self._lock:
+            self._pending[slot] = data
+            self._last = slot
+        self._queue.put(slot)
+        return data
+
+    def load(self, slot):
+        with self._lock:
+            data = self._pending.get(slot)
+        if data is None:
+            with open(self.path(slot), "rb") as file:
+                data = file.read()
+        return load(data)
+
+    def exists(self, slot):
+        with self._lock:
+            if slot in self._pending:
+                return True
+        return os.path.exists(self.path(slot))
+
+    def readable(self, slot):
+        # Only the prefix is checked: slots from other builds are skipped
+        # without loading them, damage further in shows up in load().
+        with self._lock:
+            data = self._pending.get(slot)
+        if data is None:
+            try:
+                with open(self.path(slot), "rb") as file:
+                    data = file.read(PREFIX.size)
+            except OSError:
+                return False
+        if len(data) < PREFIX.size:
+            return False
+        return PREFIX.unpack_from(data) == (MAGIC, VERSION)
+
+    def saved(self):
+        # Readable slots, newest first.
+        slots = [slot for slot in range(self.slots) if self.readable(slot)]
+        return sorted(slots, key=self._age)
+
+    def _age(self, slot):
+        try:
+            mtime = os.path.getmtime(self.path(slot))
+        except OSError:
+            mtime = 0
+        return slot != self._last, -mtime
+
+    def latest(self):
+        saved = self.saved()
+        return saved[0] if saved else None
+
+    def load_latest(self):
+        # Falls back to older slots when the newest one is damaged.
+        for slot in self.saved():
+            try:
+                return self.load(slot)
+            except (SaveError, OSError):
+                pass
+        return None
+
+    def flush(self):
+        self._queue.join()
+
+    def _write_loop(self):
+        while True:
+            slot = self._queue.get()
+            try:
+                with self._lock:
+                    data = self._pending.get(slot)
+                if data is not None:
+                    self._write(slot, data)
+                    with self._lock:
+                        if self._pending.get(slot) is data:
+                            del self._pending[slot]
+            finally:
+                self._queue.task_done()
+
+    def _write(self, slot, data):
+        os.makedirs(self.directory, exist_ok=True)
+        temp = self.path(slot) + ".tmp"
+        with open(temp, "wb") as file:
+            file.write(data)
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(temp, self.path(slot))
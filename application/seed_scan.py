@@ -0,0 +1,260 @@
+from application.level import (
+    CellState, GENERATOR_VERSION, create_level, spawn_points)
+from application.batch import run_game
+from application.policy import POLICIES
+
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+import argparse
+import sqlite3
+import heapq
+import time
+
+
+WALLS = {CellState.BrickWall.value, CellState.ConcreteWall.value}
+CONCRETE = CellState.ConcreteWall.value
+BRICK = CellState.BrickWall.value
+
+# A brick has to be shot before it can be crossed.
+BRICK_COST = 3
+BASE_RADIUS = 3
+
+NEIGHBOURS = [(1, 0), (-1, 0), (0, 1), (0, -1)]
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS levels (
+    generator INTEGER NOT NULL,
+    size INTEGER NOT NULL,
+    seed INTEGER NOT NULL,
+    path_min INTEGER,
+    path_mean REAL,
+    wall_density REAL NOT NULL,
+    corridors INTEGER NOT NULL,
+    difficulty REAL NOT NULL,
+    outcome TEXT,
+    ticks INTEGER,
+    score INTEGER,
+    PRIMARY KEY (generator, size, seed)
+);
+CREATE INDEX IF NOT EXISTS levels_difficulty
+    ON levels (generator, size, difficulty);
+"""
+
+COLUMNS = ["generator", "size", "seed", "path_min", "path_mean",
+           "wall_density", "corridors", "difficulty",
+           "outcome", "ticks", "score"]
+
+
+def flag_distances(cells, size):
+    # Dijkstra from the flag: open cells cost a move, bricks a shot
+    # and a move, concrete is impassable.
+    flag = (size - 1) * size + size // 2
+    distances = {flag: 0}
+    queue = [(0, flag)]
+    while queue:
+        distance, index = heapq.heappop(queue)
+        if distances[index] < distance:
+            continue
+        row, column = divmod(index, size)
+        for dy, dx in NEIGHBOURS:
+            y, x = row + dy, column + dx
+            if not (0 <= y < size and 0 <= x < size):
+                continue
+            neighbour = y * size + x
+            code = cells[neighbour]
+            if code == CONCRETE:
+                continue
+            cost = distance + (BRICK_COST if code == BRICK else 1)
+            if cost < distances.get(neighbour, cost + 1):
+                distances[neighbour] = cost
+                heapq.heappush(queue, (cost, neighbour))
+    return distances
+
+
+def open_reach(cells, size, starts):
+    reached = set(starts)
+    stack = list(starts)
+    while stack:
+        row, column = divmod(stack.pop(), size)
+        for dy, dx in NEIGHBOURS:
+            y, x = row + dy, column + dx
+            neighbour = y * size + x
+            if (0 <= y < size and 0 <= x < size
+                    and neighbour not in reached
+                    and cells[neighbour] not in WALLS):
+                reached.add(neighbour)
+                stack.append(neighbour)
+    return reached
+
+
+def base_ring(size, radius=BASE_RADIUS):
+    # Cells at distance radius around the flag, walked from the left
+    # edge over the top to the right edge.
+    row, column = size - 1, size // 2
+    left, right, top = column - radius, column + radius, row - radius
+    ring = [(y, left) for y in range(row, top, -1)]
+    ring += [(top, x) for x in range(left, right + 1)]
+    ring += [(y, right) for y in range(top + 1, row + 1)]
+    return [(y, x) for y, x in ring if 0 <= y < size and 0 <= x < size]
+
+
+def corridors(cells, size, reached, radius=BASE_RADIUS):
+    count = 0
+    inside = False
+    for y, x in base_ring(size, radius):
+        index = y * size + x
+        is_open = index in reached and cells[index] not in WALLS
+        if is_open and not inside:
+            count += 1
+        inside = is_open
+    return count
+
+
+def wall_density(cells, size, radius=BASE_RADIUS):
+    row, column = size - 3, size // 2
+    walls = total = 0
+    for y in range(max(row - radius, 0), min(row + radius, size - 1) + 1):
+        for x in range(max(column - radius, 0),
+                       min(column + radius, size - 1) + 1):
+            walls += cells[y * size + x] in WALLS
+            total += 1
+    return walls / total
+
+
+def difficulty(path_min, density, approaches):
+    # Short paths and many open approaches favour the enemies,
+    # walls around the base favour the player.
+    if path_min is None:
+        return 0.0
+    return round(100 * (1 + approaches) * (1 - density) / path_min, 3)
+
+
+def level_metrics(level):
+    size, cells = level.size, level.cells
+    spawns = [y * size + x for y, x in spawn_points(size)]
+    distances = flag_distances(cells, size)
+    paths = [distances[spawn] for spawn in spawns if spawn in distances]
+    reached = open_reach(cells, size, spawns)
+    density = wall_density(cells, size)
+    approaches = corridors(cells, size, reached)
+    path_min = min(paths) if paths else None
+    return {
+        "path_min": path_min,
+        "path_mean": round(sum(paths) / len(paths), 3) if paths else None,
+        "wall_density": round(density, 4),
+        "corridors": approaches,
+        "difficulty": difficulty(path_min, density, approaches)
+    }
+
+
+def scan_seed(seed, size=13, policy="hunter", simulate_ticks=0):
+    row = {"generator": GENERATOR_VERSION, "size": size, "seed": seed,
+           "outcome": None, "ticks": None, "score": None}
+    row.update(level_metrics(create_level(size, seed)))
+    if simulate_ticks:
+        result = run_game(seed, policy, size, simulate_ticks)
+        row.update(outcome=result["outcome"], ticks=result["ticks"],
+                   score=result["score"])
+    return row
+
+
+def connect(path):
+    connection = sqlite3.connect(path)
+    connection.executescript(SCHEMA)
+    return connection
+
+
+def store(connection, rows):
+    connection.executemany(
+        f"INSERT OR REPLACE INTO levels ({', '.join(COLUMNS)}) "
+        f"VALUES ({', '.join('?' * len(COLUMNS))})",
+        [[row[column] for column in COLUMNS] for row in rows])
+    connection.commit()
+
+
+def scan(seeds, connection, size=13, workers=1, policy="hunter",
+         simulate_ticks=0, batch=1000):
+    job = partial(scan_seed, size=size, policy=policy,
+                  simulate_ticks=simulate_ticks)
+    pending = list()
+    count = 0
+
+    def flush():
+        store(connection, pending)
+        pending.clear()
+
+    if workers == 1:
+        rows = map(job, seeds)
+        pool = None
+    else:
+        pool = ProcessPoolExecutor(max_workers=workers)
+        chunksize = max(1, len(seeds) // (workers * 16))
+        rows = pool.map(job, seeds, chunksize=chunksize)
+    try:
+        for row in rows:
+            pending.append(row)
+            count += 1
+            if len(pending) >= batch:
+                flush()
+        flush()
+    finally:
+        if pool:
+            pool.shutdown()
+    return count
+
+
+def pick(connection, size, low, high, limit=10):
+    cursor = connection.execute(
+        "SELECT seed, difficulty FROM levels "
+        "WHERE generator = ? AND size = ? AND difficulty BETWEEN ? AND ? "
+        "ORDER BY difficulty LIMIT ?",
+        (GENERATOR_VERSION, size, low, high, limit))
+    return cursor.fetchall()
+
+
+def create_parser():
+    parser = argparse.ArgumentParser(
+        description="Rate generated levels and pick seeds by difficulty")
+    parser.add_argument("--database", default="levels.db")
+    parser.add_argument("--size", type=int, default=13)
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    scanner = commands.add_parser("scan", help="rate a range of seeds")
+    scanner.add_argument("first", type=int, help="First seed")
+    scanner.add_argument("last", type=int, help="Last seed (inclusive)")
+    scanner.add_argument("--workers", type=int, default=1)
+    scanner.add_argument(
+        "--simulate-ticks", type=int, default=0,
+        help="Also play each level with a bot for this many ticks")
+    scanner.add_argument(
+        "--policy", choices=sorted(POLICIES), default="hunter")
+
+    picker = commands.add_parser("pick", help="list seeds by difficulty")
+    picker.add_argument("low", type=float)
+    picker.add_argument("high", type=float)
+    picker.add_argument("--limit", type=int, default=10)
+    return parser
+
+
+def main():
+    args = create_parser().parse_args()
+    connection = connect(args.database)
+    try:
+        if args.command == "scan":
+            seeds = list(range(args.first, args.last + 1))
+            started = time.perf_counter()
+            count = scan(seeds, connection, args.size, args.workers,
+                         args.policy, args.simulate_ticks)
+            elapsed = time.perf_counter() - started
+            print(f"{count} seeds in {elapsed:.2f}s, "
+                  f"{count / elapsed:.1f} seeds/sec")
+        else:
+            for seed, rating in pick(connection, args.size, args.low,
+                                     args.high, args.limit):
+                print(f"{seed}\t{rating}")
+    finally:
+        connection.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,506 @@
+from application.game import Game, GameStatus
+from application.level import create_level
+from application.replay import encode_input, decode_input, DIRECTIONS
+from application.save import (
+    cell_code, DIRECTIONS as CELL_DIRECTIONS,
+    ENEMY_TYPES, BONUS_TYPES, BOOM_TYPES, STATUSES)
+
+from domain.enemy import Enemy
+from domain.player import Player
+from domain.bullet import Bullet
+from domain.bonus import Bonus
+from domain.boom import BoomType
+
+import argparse
+import asyncio
+import struct
+import itertools
+
+
+MESSAGE = struct.Struct("<IB")
+SESSION = struct.Struct("<I")
+WELCOME_BODY = struct.Struct("<IH")
+SEED_COUNT = struct.Struct("<H")
+SEED = struct.Struct("<q")
+FRAME = struct.Struct("<IIIBBB")
+CELL = struct.Struct("<IBB")
+
+# Limits on what a client may ask for; frames sent by the server are
+# not bound by MAX_MESSAGE.
+MAX_MESSAGE = 4096
+MAX_LEVELS = 100
+MAX_SESSIONS = 256
+
+# Client messages
+CREATE = 1
+JOIN = 2
+WATCH = 3
+INPUT = 4
+
+# Server messages
+WELCOME = 16
+FULL = 17
+DELTA = 18
+ERROR = 19
+
+# Unit codes, low nibble of the unit byte; the high nibble is the direction
+NO_UNIT = 0
+PLAYER_UNIT = 1
+ENEMY_UNIT = 2
+PLAYER_BULLET_UNIT = 6
+ENEMY_BULLET_UNIT = 7
+
+# Overlay codes, high nibble of the tile byte; the low nibble is terrain
+BONUS_OVERLAY = 1
+BOOM_OVERLAY = 8
+
+# Ticks a boom overlay is sent for; small booms turn big halfway.
+BOOM_TICKS = {
+    BoomType.Small: 32,
+    BoomType.Wall: 16
+}
+
+
+def encode_cell(cell, boom=None):
+    tile = cell_code(cell)
+    unit = NO_UNIT
+    if boom:
+        tile |= (BOOM_OVERLAY + BOOM_TYPES.index(boom)) << 4
+    for obj in cell:
+        if isinstance(obj, Bonus):
+            tile |= (BONUS_OVERLAY + BONUS_TYPES.index(obj.type)) << 4
+        elif isinstance(obj, Player):
+            unit = PLAYER_UNIT | CELL_DIRECTIONS.index(obj.direction) << 4
+        elif isinstance(obj, Enemy):
+            unit = (ENEMY_UNIT + ENEMY_TYPES.index(obj.type)
+                    | CELL_DIRECTIONS.index(obj.direction) << 4)
+        elif isinstance(obj, Bullet) and unit == NO_UNIT:
+            kind = (PLAYER_BULLET_UNIT if isinstance(obj.parent, Player)
+                    else ENEMY_BULLET_UNIT)
+            unit = kind | CELL_DIRECTIONS.index(obj.direction) << 4
+    return tile, unit
+
+
+def message(kind, body=b""):
+    return MESSAGE.pack(len(body) + 1, kind) + body
+
+
+class ProtocolError(Exception):
+    pass
+
+
+async def read_message(reader, limit=None):
+    length, kind = MESSAGE.unpack(await reader.readexactly(MESSAGE.size))
+    if length < 1 or (limit is not None and length - 1 > limit):
+        raise ProtocolError(f"Bad message length {length}")
+    body = await reader.readexactly(length - 1)
+    return kind, body
+
+
+class Session:
+    def __init__(self, session_id, seeds, size=13):
+        self.id = session_id
+        self.seeds = list(seeds)
+        self.size = size
+        self.levels = [create_level(size, seed) for seed in self.seeds]
+        self.game = Game(size=size, seed=self.seeds[0])
+        self.game.levels_count = len(self.levels)
+        self.game.start(self.levels[0])
+        self.input = (None, False)
+        self.clients = list()
+        self.tiles = bytearray(size * size)
+        self.units = bytearray(size * size)
+        self.finished = False
+        self.changed = None
+        self.booms = dict()
+        self._map = None
+        self._changes = None
+        self._header = None
+        self._full = None
+        self.delta_message()
+
+    def _status(self):
+        game = self.game
+        return (game.score, game.player.health,
+                STATUSES.index(game.status), game.level_num)
+
+    def _frame(self, kind, count, body):
+        score, health, status, level = self._header
+        return message(kind, FRAME.pack(
+            self.game.clock.ticks, score, count, health, status, level) + body)
+
+    def _rescan(self):
+        game_map = self.game.map
+        if self._map is not None:
+            self._map.untrack_changes(self._changes)
+        self._map = game_map
+        self._changes = game_map.track_changes()
+        self.booms.clear()
+        for location in game_map:
+            index = location.y * self.size + location.x
+            self.tiles[index], self.units[index] = encode_cell(
+                game_map[location])
+
+    def full_message(self):
+        if self._full is None:
+            self._full = self._frame(
+                FULL, self.size * self.size,
+                bytes(self.tiles) + bytes(self.units))
+        return self._full
+
+    def delta_message(self):
+        if self.game.map is not self._map:
+            self._rescan()
+            self._header = self._status()
+            self.changed = None
+            return None
+
+        game_map = self.game.map
+        dirty = set(self._changes)
+        self._changes.clear()
+        # Rotations change objects without moving them.
+        for obj in game_map.get_objects(Player, Enemy):
+            dirty.add(obj.location)
+        dirty.update(self._age_booms())
+
+        cells = list()
+        self.changed = list()
+        width = self.size
+        for location in dirty:
+            index = location.y * width + location.x
+            tile, unit = encode_cell(
+                game_map[location], self.boom_stage(location))
+            if self.tiles[index] != tile or self.units[index] != unit:
+                self.tiles[index] = tile
+                self.units[index] = unit
+                self.changed.append(index)
+                cells.append(CELL.pack(index, tile, unit))
+
+        header = self._status()
+        if not cells and header == self._header:
+            return b""
+        self._header = header
+        return self._frame(DELTA, len(cells), b"".join(cells))
+
+    def boom_stage(self, location):
+        boom = self.booms.get(location)
+        if boom is None:
+            return None
+        _type, started = boom
+        age = self.game.clock.ticks - started
+        if _type == BoomType.Small and age >= BOOM_TICKS[_type] // 2:
+            return BoomType.Big
+        return _type
+
+    def _age_booms(self):
+        # The game only reports when a boom starts; clients still get
+        # it as an overlay for a while.
+        ticks = self.game.clock.ticks
+        for boom in self.game.booms:
+            self.booms[boom.location] = (boom.type, ticks)
+        dirty = list(self.booms)
+        for location in dirty:
+            _type, started = self.booms[location]
+            if ticks - started >= BOOM_TICKS[_type]:
+                del self.booms[location]
+        return dirty
+
+    def tick(self):
+        game = self.game
+        if game.status == GameStatus.NextLevel:
+            game.start(self.levels[game.level_num - 1])
+        game.update(*self.input)
+        self._full = None
+        delta = self.delta_message()
+        if game.status in [GameStatus.End, GameStatus.Win]:
+            self.finished = True
+        return delta
+
+
+class Connection:
+    def __init__(self, writer, limit):
+        self.writer = writer
+        self.limit = limit
+        self.session = None
+        self.player = False
+        self.stale = True
+        self.dropped = 0
+        self.sent = 0
+
+    def write(self, data):
+        self.writer.write(data)
+        self.sent += len(data)
+
+    def send(self, session, delta):
+        transport = self.writer.transport
+        if transport.is_closing():
+            return
+        if transport.get_write_buffer_size() > self.limit:
+            # Never block the tick loop on a slow reader: drop deltas
+            # and resynchronise with a full frame once it catches up.
+            self.stale = True
+            self.dropped += 1
+            return
+        if self.stale or delta is None:
+            self.write(session.full_message())
+            self.stale = False
+        elif delta:
+            self.write(delta)
+
+
+class GameServer:
+    def __init__(self, size=13, tick=0.01, send_limit=64 * 1024,
+                 max_lag=10, max_sessions=MAX_SESSIONS):
+        self.size = size
+        self.tick_seconds = tick
+        self.send_limit = send_limit
+        self.max_lag = max_lag
+        self.max_sessions = max_sessions
+        self.sessions = dict()
+        self.ticks = 0
+        self.overruns = 0
+        self.port = None
+        self._ids = itertools.count(1)
+        self._server = None
+        self._ticker = None
+        self._handlers = dict()
+
+    def create_session(self, seeds):
+        session = Session(next(self._ids), seeds, self.size)
+        self.sessions[session.id] = session
+        return session
+
+    def tick(self):
+        self.ticks += 1
+        for session in list(self.sessions.values()):
+            delta = session.tick()
+            for connection in session.clients:
+                connection.send(session, delta)
+            if session.finished:
+                self.close_session(session)
+
+    def close_session(self, session):
+        self.sessions.pop(session.id, None)
+        for connection in session.clients:
+            connection.writer.close()
+        session.clients = list()
+
+    async def _tick_loop(self):
+        loop = asyncio.get_running_loop()
+        deadline = loop.time()
+        while True:
+            deadline += self.tick_seconds
+            self.tick()
+            delay = deadline - loop.time()
+            if delay < -self.tick_seconds * self.max_lag:
+                self.overruns += 1
+                deadline = loop.time()
+                delay = 0
+            await asyncio.sleep(max(delay, 0))
+
+    async def start(self, host="127.0.0.1", port=0):
+        self._server = await asyncio.start_server(self._handle, host, port)
+        self.port = self._server.sockets[0].getsockname()[1]
+        self._ticker = asyncio.ensure_future(self._tick_loop())
+        return self
+
+    async def close(self):
+        if self._ticker:
+            self._ticker.cancel()
+        for session in list(self.sessions.values()):
+            self.close_session(session)
+        if self._server:
+            self._server.close()
+        for writer in self._handlers.values():
+            writer.close()
+        await asyncio.gather(*self._handlers, return_exceptions=True)
+        if self._server:
+            await self._server.wait_closed()
+
+    def _attach(self, connection, session, player):
+        if session is None:
+            connection.write(message(ERROR, b"Unknown session"))
+            return
+        if connection.session is not session:
+            self._detach(connection)
+        elif connection in session.clients:
+            session.clients.remove(connection)
+        connection.session = session
+        connection.player = player
+        connection.stale = True
+        session.clients.append(connection)
+        connection.write(message(
+            WELCOME, WELCOME_BODY.pack(session.id, session.size)))
+        connection.send(session, None)
+
+    def _detach(self, connection):
+        session = connection.session
+        connection.session = None
+        if session and connection in session.clients:
+            session.clients.remove(connection)
+            # Nobody is left to play or watch it.
+            if not session.clients:
+                self.close_session(session)
+
+    def _on_message(self, connection, kind, body):
+        if kind == CREATE:
+            count, = SEED_COUNT.unpack_from(body)
+            if not count:
+                raise ProtocolError("No levels given")
+            if count > MAX_LEVELS:
+                raise ProtocolError(f"At most {MAX_LEVELS} levels")
+            if len(body) != SEED_COUNT.size + count * SEED.size:
+                raise ProtocolError("Bad seed list")
+            # The session this connection leaves does not count.
+            current = connection.session
+            leaving = (current is not None
+                       and current.clients == [connection])
+            if len(self.sessions) - leaving >= self.max_sessions:
+                raise ProtocolError("Too many sessions")
+            seeds = struct.unpack_from(f"<{count}q", body, SEED_COUNT.size)
+            self._attach(connection, self.create_session(seeds), True)
+        elif kind in [JOIN, WATCH]:
+            session_id, = SESSION.unpack(body)
+            self._attach(connection, self.sessions.get(session_id),
+                         kind == JOIN)
+        elif kind == INPUT:
+            if len(body) != 1 or body[0] & 7 >= len(DIRECTIONS):
+                raise ProtocolError("Bad input")
+            if connection.player:
+                direction, fire, _ = decode_input(body[0])
+                connection.session.input = (direction, fire)
+        else:
+            raise ProtocolError(f"Unknown message kind {kind}")
+
+    async def _handle(self, reader, writer):
+        connection = Connection(writer, self.send_limit)
+        task = asyncio.current_task()
+        self._handlers[task] = writer
+        try:
+            while True:
+                kind, body = await read_message(reader, MAX_MESSAGE)
+                try:
+                    self._on_message(connection, kind, body)
+                except (ProtocolError, struct.error,
+                        ValueError, IndexError) as err:
+                    # The stream is still in step, only this request
+                    # is refused.
+                    connection.write(message(ERROR, str(err).encode()))
+        except ProtocolError as err:
+            # Past a bad length prefix nothing can be read reliably.
+            connection.write(message(ERROR, str(err).encode()))
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            self._detach(connection)
+            del self._handlers[task]
+            writer.close()
+
+
+class GameClient:
+    def __init__(self, reader, writer):
+        self.reader = reader
+        self.writer = writer
+        self.session = None
+        self.size = 0
+        self.tick = 0
+        self.score = 0
+        self.health = 0
+        self.status = None
+        self.level = 0
+        self.tiles = bytearray()
+        self.units = bytearray()
+        self.changed = None
+        self.received = 0
+
+    @classmethod
+    async def connect(cls, host="127.0.0.1", port=8765):
+        reader, writer = await asyncio.open_connection(host, port)
+        return cls(reader, writer)
+
+    async def _welcome(self):
+        kind, body = await read_message(self.reader)
+        if kind == ERROR:
+            raise ConnectionError(body.decode())
+        self.session, self.size = WELCOME_BODY.unpack(body)
+        await self.receive()
+        return self.session
+
+    async def create(self, seeds):
+        body = SEED_COUNT.pack(len(seeds)) + b"".join(
+            SEED.pack(seed) for seed in seeds)
+        self.writer.write(message(CREATE, body))
+        return await self._welcome()
+
+    async def join(self, session):
+        self.writer.write(message(JOIN, SESSION.pack(session)))
+        return await self._welcome()
+
+    async def watch(self, session):
+        self.writer.write(message(WATCH, SESSION.pack(session)))
+        return await self._welcome()
+
+    def send_input(self, direction=None, fire=False):
+        self.writer.write(message(
+            INPUT, bytes([encode_input(direction, fire)])))
+
+    async def receive(self):
+        kind, body = await read_message(self.reader)
+        self.received += MESSAGE.size + len(body)
+        if kind == ERROR:
+            raise ProtocolError(body.decode(errors="replace"))
+        (self.tick, self.score, count,
+         self.health, status, self.level) = FRAME.unpack_from(body)
+        self.status = STATUSES[status]
+        offset = FRAME.size
+        if kind == FULL:
+            self.tiles = bytearray(body[offset:offset + count])
+            self.units = bytearray(body[offset + count:offset + 2 * count])
+            self.changed = None
+        elif kind == DELTA:
+            self.changed = list()
+            for _ in range(count):
+                index, tile, unit = CELL.unpack_from(body, offset)
+                self.tiles[index] = tile
+                self.units[index] = unit
+                self.changed.append(index)
+                offset += CELL.size
+        return kind
+
+    async def close(self):
+        self.writer.close()
+        await self.writer.wait_closed()
+
+
+def create_parser():
+    parser = argparse.ArgumentParser(
+        description="Host Battle City sessions over TCP")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--size", type=int, default=13)
+    parser.add_argument("--tick-ms", type=float, default=10,
+                        help="simulation tick length in milliseconds")
+    parser.add_argument("--max-sessions", type=int, default=MAX_SESSIONS)
+    return parser
+
+
+async def serve(args):
+    server = GameServer(size=args.size, tick=args.tick_ms / 1000,
+                        max_sessions=args.max_sessions)
+    await server.start(args.host, args.port)
+    print(f"serving on {args.host}:{server.port}")
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await server.close()
+
+
+def main():
+    try:
+        asyncio.run(serve(create_parser().parse_args()))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,258 @@
+from domain.obstacle import Wall, WallType
+from domain.enemy import Enemy, EnemyType
+from domain.terrain import Grass
+from domain.player import Player
+from domain.bullet import Bullet, BulletType
+from domain.bonus import Bonus
+from domain.flag import Flag
+
+from multiprocessing import shared_memory, resource_tracker, parent_process
+import time
+
+import numpy as np
+
+
+HEADER = np.dtype([
+    ("seq", "<u8"),
+    ("tick", "<u8"),
+    ("size", "<u4"),
+    ("capacity", "<u4"),
+    ("count", "<u4"),
+    ("score", "<u4"),
+    ("status", "<u4"),
+    ("level", "<u4")
+])
+HEADER_SIZE = 64
+
+ENTITY = np.dtype([
+    ("kind", "u1"),
+    ("direction", "u1"),
+    ("health", "u1"),
+    ("type", "u1"),
+    ("x", "<u2"),
+    ("y", "<u2")
+])
+
+# Terrain layer codes
+EMPTY = 0
+BRICK = 1
+CONCRETE = 2
+GRASS = 3
+FLAG = 4
+
+# Entity table kinds
+PLAYER = 1
+ENEMY = 2
+PLAYER_BULLET = 3
+ENEMY_BULLET = 4
+BOOM = 5
+
+ENEMY_TYPES = {
+    EnemyType.Haunting: 1,
+    EnemyType.Patrolling: 2,
+    EnemyType.SpawnHaunting: 3,
+    EnemyType.SpawnPatrolling: 4
+}
+
+BULLET_TYPES = {
+    BulletType.Normal: 1,
+    BulletType.Concrete: 2
+}
+
+# Segments created by this process.
+_created = set()
+
+
+def frame_size(size, capacity):
+    return HEADER_SIZE + 2 * size * size + capacity * ENTITY.itemsize
+
+
+class _Layout:
+    def __init__(self, buffer, size, capacity):
+        cells = size * size
+        self.header = np.ndarray((), HEADER, buffer, 0)
+        self.seq = np.ndarray((1,), "<u8", buffer, 0)
+        self.terrain = np.ndarray(
+            (size, size), np.uint8, buffer, HEADER_SIZE)
+        self.bonus = np.ndarray(
+            (size, size), np.uint8, buffer, HEADER_SIZE + cells)
+        self.entities = np.ndarray(
+            (capacity,), ENTITY, buffer, HEADER_SIZE + 2 * cells)
+
+
+class Frame:
+    def __init__(self, size, capacity):
+        self.sequence = 0
+        self.tick = 0
+        self.score = 0
+        self.status = 0
+        self.level = 0
+        self.count = 0
+        self.terrain = np.zeros((size, size), np.uint8)
+        self.bonus = np.zeros((size, size), np.uint8)
+        self.entities = np.zeros((capacity,), ENTITY)
+
+    def get_entities(self):
+        return self.entities[:self.count]
+
+
+class StateWriter:
+    def __init__(self, size, capacity=1024, name=None):
+        self.size = size
+        self.capacity = capacity
+        self.memory = shared_memory.SharedMemory(
+            name=name, create=True, size=frame_size(size, capacity))
+        self.name = self.memory.name
+        _created.add(self.name)
+        self._layout = _Layout(self.memory.buf, size, capacity)
+        self._layout.header["size"] = size
+        self._layout.header["capacity"] = capacity
+        self._entities = np.zeros((capacity,), ENTITY)
+
+    def __call__(self, game):
+        self.publish(game)
+
+    def _fill_terrain(self, game, terrain, bonus):
+        terrain.fill(EMPTY)
+        bonus.fill(0)
+        for obj in game.map.get_objects(Wall, Grass, Flag, Bonus):
+            x, y = obj.location.x, obj.location.y
+            if isinstance(obj, Wall):
+                terrain[y, x] = (BRICK if obj.wall_type == WallType.Brick
+                                 else CONCRETE)
+            elif isinstance(obj, Grass):
+                terrain[y, x] = GRASS
+            elif isinstance(obj, Flag):
+                terrain[y, x] = FLAG
+            else:
+                bonus[y, x] = obj.type.value
+
+    def _fill_entities(self, game):
+        rows = list()
+        # Booms are the explosions that started on this tick.
+        for obj in game.map.get_objects(Player, Enemy, Bullet) + game.booms:
+            if isinstance(obj, Player):
+                row = (PLAYER, obj.direction.value, obj.health, obj.cheat)
+            elif isinstance(obj, Enemy):
+                row = (ENEMY, obj.direction.value, obj.health,
+                       ENEMY_TYPES[obj.type])
+            elif isinstance(obj, Bullet):
+                kind = (PLAYER_BULLET if isinstance(obj.parent, Player)
+                        else ENEMY_BULLET)
+                row = (kind, obj.direction.value, 0,
+                       BULLET_TYPES[obj.bullet_type])
+            else:
+                row = (BOOM, 0, 0, obj.type.value)
+            rows.append(row + (obj.location.x, obj.location.y))
+            if len(rows) == self.capacity:
+                break
+
+        count = len(rows)
+        if count:
+            self._entities[:count] = rows
+        return count
+
+    def publish(self, game):
+        layout = self._layout
+        count = self._fill_entities(game)
+
+        sequence = int(layout.seq[0]) + 1
+        layout.seq[0] = sequence
+        self._fill_terrain(game, layout.terrain, layout.bonus)
+        layout.entities[:count] = self._entities[:count]
+        header = layout.header
+        header["tick"] = game.clock.ticks
+        header["count"] = count
+        header["score"] = game.score
+        header["status"] = game.status.value if game.status else 0
+        header["level"] = game.level_num
+        layout.seq[0] = sequence + 1
+
+    def close(self):
+        self._layout = None
+        self.memory.close()
+        self.memory.unlink()
+        _created.discard(self.name)
+
+
+class StateReader:
+    def __init__(self, name):
+        self.memory = _attach(name)
+        header = np.ndarray((), HEADER, self.memory.buf, 0)
+        self.size = int(header["size"])
+        self.capacity = int(header["capacity"])
+        self._layout = _Layout(self.memory.buf, self.size, self.capacity)
+        self.retries = 0
+
+    @property
+    def sequence(self):
+        return int(self._layout.seq[0])
+
+    def views(self):
+        return self._layout
+
+    def is_consistent(self, sequence):
+        return sequence % 2 == 0 and self.sequence == sequence
+
+    def read(self, frame=None, timeout=None):
+        # Returns None if no consistent frame turns up within timeout,
+        # e.g. when the writer died in the middle of a publish.
+        if frame is None:
+            frame = Frame(self.size, self.capacity)
+        layout = self._layout
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            sequence = self.sequence
+            if sequence % 2:
+                if deadline is not None and time.monotonic() > deadline:
+                    return None
+                self.retries += 1
+                time.sleep(0)
+                continue
+
+            header = layout.header
+            count = int(header["count"])
+            np.copyto(frame.terrain, layout.terrain)
+            np.copyto(frame.bonus, layout.bonus)
+            frame.entities[:count] = layout.entities[:count]
+            frame.count = count
+            frame.tick = int(header["tick"])
+            frame.score = int(header["score"])
+            frame.status = int(header["status"])
+            frame.level = int(header["level"])
+
+            if self.sequence == sequence:
+                frame.sequence = sequence
+                return frame
+            if deadline is not None and time.monotonic() > deadline:
+                return None
+            self.retries += 1
+            time.sleep(0)
+
+    def wait(self, sequence, timeout=None, interval=0.0005):
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while self.sequence <= sequence:
+            if deadline is not None and time.monotonic() > deadline:
+                return False
+            time.sleep(interval)
+        return True
+
+    def close(self):
+        self._layout = None
+        self.memory.close()
+
+
+def _attach(name):
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:
+        pass
+
+    # Before Python 3.13 attaching registers the segment with the
+    # resource tracker, which unlinks it when the reader exits. The
+    # writer's process and the ones it started share one tracker, where
+    # the entry is the writer's and has to stay.
+    memory = shared_memory.SharedMemory(name=name)
+    if memory.name not in _created and parent_process() is None:
+        resource_tracker.unregister(memory._name, "shared_memory")
+    return memory
@@ -0,0 +1,151 @@
+from domain.infrastructure.geometry import Direction
+from domain.obstacle import WallType
+from domain.bonus import BonusType
+from domain.bullet import BulletType
+from domain.enemy import EnemyType
+
+from PyQt5.QtGui import QImage, QPainter, QPixmap
+from PyQt5.QtCore import QPointF, QRect, QRectF, Qt
+
+from functools import lru_cache
+import os
+
+
+IMAGES = os.path.join(os.path.dirname(__file__), "images")
+ATLAS_WIDTH = 1024
+
+# Sprites drawn smaller than a map cell, as a fraction of its side.
+FRACTIONS = {
+    "bullet_up": 0.2,
+    "bullet_down": 0.2,
+    "bullet_left": 0.2,
+    "bullet_right": 0.2,
+    "ubullet_up": 0.2,
+    "ubullet_down": 0.2,
+    "ubullet_left": 0.2,
+    "ubullet_right": 0.2,
+    "heart": 0.6
+}
+
+WALLS = {
+    WallType.Brick: "brick_wall",
+    WallType.Concrete: "concrete_wall"
+}
+
+BONUSES = {
+    BonusType.Invulnerability: "infinity",
+    BonusType.Armor: "armor",
+    BonusType.Heart: "heart_bonus",
+    BonusType.FastShooting: "bullet_bonus",
+    BonusType.SpeedRunner: "speed_bonus"
+}
+
+PLAYER = {
+    Direction.Up: ["tank_up", "cheat_tank_up", "imba_tank_up"],
+    Direction.Down: ["tank_down", "cheat_tank_down", "imba_tank_down"],
+    Direction.Left: ["tank_left", "cheat_tank_left", "imba_tank_left"],
+    Direction.Right: ["tank_right", "cheat_tank_right", "imba_tank_right"]
+}
+
+ENEMIES = {
+    EnemyType.Patrolling: {
+        Direction.Up: "enemy_up",
+        Direction.Down: "enemy_down",
+        Direction.Left: "enemy_left",
+        Direction.Right: "enemy_right"
+    },
+
+    EnemyType.Haunting: {
+        Direction.Up: "enemy1_up",
+        Direction.Down: "enemy1_down",
+        Direction.Left: "enemy1_left",
+        Direction.Right: "enemy1_right"
+    },
+
+    EnemyType.SpawnPatrolling: {
+        Direction.Down: "spawn_1"
+    },
+
+    EnemyType.SpawnHaunting: {
+        Direction.Down: "spawn_1"
+    }
+}
+
+BULLETS = {
+    BulletType.Normal: {
+        Direction.Up: "bullet_up",
+        Direction.Down: "bullet_down",
+        Direction.Left: "bullet_left",
+        Direction.Right: "bullet_right"
+    },
+
+    BulletType.Concrete: {
+        Direction.Up: "ubullet_up",
+        Direction.Down: "ubullet_down",
+        Direction.Left: "ubullet_left",
+        Direction.Right: "ubullet_right"
+    }
+}
+
+
+class SpriteAtlas:
+    def __init__(self, scale=50, directory=IMAGES):
+        self.scale = scale
+        self.rects = dict()
+        images = dict()
+        for name in sorted(os.listdir(directory)):
+            stem, extension = os.path.splitext(name)
+            if extension == ".png":
+                images[stem] = QImage(os.path.join(directory, name))
+
+        height = self._pack({name: self.side(name) for name in images})
+        self.pixmap = QPixmap(ATLAS_WIDTH, height)
+        self.pixmap.fill(Qt.transparent)
+        # Scale every sprite once, the same way drawImage into a
+        # target rectangle would, so drawing is a plain blit.
+        painter = QPainter(self.pixmap)
+        for name, image in images.items():
+            painter.drawImage(self.rects[name], image)
+        painter.end()
+        self.sources = {
+            name: (QRectF(rect), rect.width() / 2)
+            for name, rect in self.rects.items()}
+
+    def side(self, name):
+        return max(1, round(self.scale * FRACTIONS.get(name, 1)))
+
+    def _pack(self, sides):
+        # Shelves of sprites, biggest first.
+        x = y = shelf = 0
+        for name in sorted(sides, key=lambda name: -sides[name]):
+            side = sides[name]
+            if x + side > ATLAS_WIDTH:
+                x, y, shelf = 0, y + shelf, 0
+            self.rects[name] = QRect(x, y, side, side)
+            x += side
+            shelf = max(shelf, side)
+        return y + shelf
+
+    def __contains__(self, name):
+        return name in self.rects
+
+    def draw(self, painter, name, x, y):
+        rect = self.rects[name]
+        painter.drawPixmap(x, y, self.pixmap, rect.x(), rect.y(),
+                           rect.width(), rect.height())
+
+    def fragment(self, name, x, y, scale=1.0, opacity=1.0):
+        # Fragments are placed, scaled and faded around their centre.
+        source, half = self.sources[name]
+        return QPainter.PixmapFragment.create(
+            QPointF(x + half, y + half), source, scale, scale, 0, opacity)
+
+    def draw_batch(self, painter, sprites):
+        fragments = [self.fragment(*sprite) for sprite in sprites]
+        if fragments:
+            painter.drawPixmapFragments(fragments, self.pixmap)
+
+
+@lru_cache(maxsize=None)
+def load_atlas(scale=50, directory=IMAGES):
+    return SpriteAtlas(scale, directory)
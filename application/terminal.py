@@ -0,0 +1,308 @@
+from application.server import (
+    Session, GameClient, ProtocolError, ENEMY_UNIT, PLAYER_UNIT,
+    PLAYER_BULLET_UNIT, ENEMY_BULLET_UNIT, BOOM_OVERLAY)
+from application.save import (
+    EMPTY, BRICK, CONCRETE, GRASS, FLAG, DIRECTIONS, BOOM_TYPES)
+from application.game import GameStatus
+from application.policy import POLICIES
+
+from domain.infrastructure.geometry import Direction
+from domain.boom import BoomType
+
+import argparse
+import asyncio
+import curses
+import sys
+
+
+HOLD_TICKS = 30
+
+ARROWS = {
+    Direction.Up: "^",
+    Direction.Down: "v",
+    Direction.Left: "<",
+    Direction.Right: ">"
+}
+
+TERRAIN = {
+    EMPTY: ("  ", None),
+    BRICK: ("##", "brick"),
+    CONCRETE: ("[]", "concrete"),
+    GRASS: ('""', "grass"),
+    FLAG: ("FL", "flag")
+}
+
+ENEMY_LETTERS = "HPhp"
+BONUS_LETTERS = "HAIFS"
+BOOMS = {
+    BoomType.Small: "xx",
+    BoomType.Big: "XX",
+    BoomType.Wall: "%%"
+}
+
+KEYS = {
+    curses.KEY_UP: Direction.Up,
+    curses.KEY_DOWN: Direction.Down,
+    curses.KEY_LEFT: Direction.Left,
+    curses.KEY_RIGHT: Direction.Right,
+    ord("w"): Direction.Up,
+    ord("s"): Direction.Down,
+    ord("a"): Direction.Left,
+    ord("d"): Direction.Right
+}
+
+COLORS = {
+    "brick": curses.COLOR_RED,
+    "concrete": curses.COLOR_WHITE,
+    "grass": curses.COLOR_GREEN,
+    "flag": curses.COLOR_YELLOW,
+    "player": curses.COLOR_YELLOW,
+    "enemy": curses.COLOR_CYAN,
+    "bullet": curses.COLOR_WHITE,
+    "bonus": curses.COLOR_MAGENTA,
+    "boom": curses.COLOR_RED
+}
+
+STATUS_TEXT = {
+    GameStatus.End: "GAME OVER",
+    GameStatus.Win: "YOU WIN"
+}
+
+
+def glyph(tile, unit):
+    terrain, overlay = tile & 15, tile >> 4
+    kind = unit & 15
+    # Grass hides tanks and bullets, as in the window.
+    if terrain == GRASS:
+        return TERRAIN[GRASS]
+    if kind == PLAYER_UNIT:
+        return "@" + ARROWS[DIRECTIONS[unit >> 4]], "player"
+    if ENEMY_UNIT <= kind < PLAYER_BULLET_UNIT:
+        letter = ENEMY_LETTERS[kind - ENEMY_UNIT]
+        return letter + ARROWS[DIRECTIONS[unit >> 4]], "enemy"
+    if kind in [PLAYER_BULLET_UNIT, ENEMY_BULLET_UNIT]:
+        return (" *" if kind == PLAYER_BULLET_UNIT else " o"), "bullet"
+    if overlay >= BOOM_OVERLAY:
+        return BOOMS[BOOM_TYPES[overlay - BOOM_OVERLAY]], "boom"
+    if overlay:
+        return "+" + BONUS_LETTERS[overlay - 1], "bonus"
+    return TERRAIN[terrain]
+
+
+def status_line(level, score, health, status, levels_count=None):
+    level = f"{level}/{levels_count}" if levels_count else f"{level}"
+    line = f"LEVEL {level}  SCORE {score}  HEALTH {health}"
+    if status in STATUS_TEXT:
+        line += f"  {STATUS_TEXT[status]}  (q to quit)"
+    return line
+
+
+def init_colors():
+    colors = dict()
+    if not curses.has_colors():
+        return colors
+    curses.start_color()
+    curses.use_default_colors()
+    for pair, (name, color) in enumerate(COLORS.items(), 1):
+        curses.init_pair(pair, color, -1)
+        colors[name] = curses.color_pair(pair)
+    colors["player"] |= curses.A_BOLD
+    colors["enemy"] |= curses.A_BOLD
+    return colors
+
+
+class TerminalView:
+    def __init__(self, screen, colors=None):
+        self.screen = screen
+        self.colors = init_colors() if colors is None else colors
+        self.size = None
+        self.status = None
+        self.cells_drawn = 0
+
+    def _put(self, y, x, text, color=None):
+        try:
+            self.screen.addstr(y, x, text, self.colors.get(color, 0))
+        except curses.error:
+            # Clip whatever does not fit into the terminal.
+            pass
+
+    def render(self, size, tiles, units, changed, status):
+        if size != self.size:
+            self.screen.erase()
+            self.size = size
+            self.status = None
+            changed = None
+
+        indices = range(size * size) if changed is None else changed
+        drawn = 0
+        for index in indices:
+            y, x = divmod(index, size)
+            text, color = glyph(tiles[index], units[index])
+            self._put(y + 1, x * 2, text, color)
+            drawn += 1
+        self.cells_drawn += drawn
+
+        if status != self.status:
+            self.status = status
+            self._put(0, 0, status)
+            try:
+                self.screen.clrtoeol()
+            except curses.error:
+                pass
+            drawn += 1
+
+        if drawn:
+            self.screen.refresh()
+
+
+class Keyboard:
+    def __init__(self, screen, hold=HOLD_TICKS):
+        self.screen = screen
+        self.hold = hold
+        self.direction = None
+        self.direction_held = 0
+        self.fire_held = 0
+        self.closed = asyncio.Event()
+
+    def poll(self):
+        while True:
+            key = self.screen.getch()
+            if key == -1:
+                return
+            self.press(key)
+
+    def press(self, key):
+        # Terminals report no key releases, so a press is held for a
+        # while and refreshed by the terminal's key repeat.
+        if key in KEYS:
+            self.direction = KEYS[key]
+            self.direction_held = self.hold
+        elif key == ord(" "):
+            self.fire_held = self.hold
+        elif key in [ord("q"), 27]:
+            self.closed.set()
+
+    def input(self):
+        direction = self.direction if self.direction_held else None
+        fire = self.fire_held > 0
+        self.direction_held = max(self.direction_held - 1, 0)
+        self.fire_held = max(self.fire_held - 1, 0)
+        return direction, fire
+
+
+async def play_local(view, keyboard, args):
+    session = Session(0, args.seeds, args.size)
+    policy = POLICIES[args.bot](args.seeds[0]) if args.bot else None
+    loop = asyncio.get_running_loop()
+    tick = args.tick_ms / 1000
+    deadline = loop.time()
+
+    while True:
+        game = session.game
+        view.render(session.size, session.tiles, session.units,
+                    session.changed, status_line(
+                        game.level_num, game.score, game.player.health,
+                        game.status, game.levels_count))
+        if session.finished:
+            break
+
+        session.input = policy(game) if policy else keyboard.input()
+        session.tick()
+        deadline += tick
+        await asyncio.sleep(max(deadline - loop.time(), 0))
+    await keyboard.closed.wait()
+
+
+async def send_inputs(client, keyboard, tick):
+    sent = (None, False)
+    while True:
+        current = keyboard.input()
+        if current != sent:
+            client.send_input(*current)
+            sent = current
+        await asyncio.sleep(tick)
+
+
+async def watch_remote(view, keyboard, args):
+    host, port = args.connect.rsplit(":", 1)
+    client = await GameClient.connect(host, int(port))
+    if args.watch:
+        await client.watch(args.watch)
+        sender = None
+    else:
+        if args.join:
+            await client.join(args.join)
+        else:
+            await client.create(args.seeds)
+        sender = asyncio.ensure_future(
+            send_inputs(client, keyboard, args.tick_ms / 1000))
+
+    try:
+        while True:
+            view.render(client.size, client.tiles, client.units,
+                        client.changed, f"SESSION {client.session}  " +
+                        status_line(client.level, client.score,
+                                    client.health, client.status))
+            if client.status in STATUS_TEXT:
+                break
+            await client.receive()
+    except asyncio.IncompleteReadError:
+        pass
+    except ProtocolError as err:
+        view.render(client.size, client.tiles, client.units, [],
+                    f"SERVER ERROR: {err}")
+    finally:
+        if sender:
+            sender.cancel()
+    await keyboard.closed.wait()
+    await client.close()
+
+
+async def run(screen, args):
+    curses.curs_set(0)
+    screen.nodelay(True)
+    screen.keypad(True)
+    view = TerminalView(screen)
+    keyboard = Keyboard(screen)
+
+    loop = asyncio.get_running_loop()
+    loop.add_reader(sys.stdin.fileno(), keyboard.poll)
+    play = watch_remote if args.connect else play_local
+    game = asyncio.ensure_future(play(view, keyboard, args))
+    closed = asyncio.ensure_future(keyboard.closed.wait())
+    try:
+        await asyncio.wait([game, closed],
+                           return_when=asyncio.FIRST_COMPLETED)
+        if game.done():
+            game.result()
+    finally:
+        loop.remove_reader(sys.stdin.fileno())
+        game.cancel()
+        closed.cancel()
+
+
+def create_parser():
+    parser = argparse.ArgumentParser(
+        description="Play or watch Battle City in a terminal")
+    parser.add_argument("seeds", type=int, nargs="*", default=[1],
+                        help="level seeds for a new game")
+    parser.add_argument("--size", type=int, default=13)
+    parser.add_argument("--tick-ms", type=float, default=10)
+    parser.add_argument("--bot", choices=sorted(POLICIES),
+                        help="let a policy play a local game")
+    parser.add_argument("--connect", metavar="HOST:PORT",
+                        help="use a game server instead of a local game")
+    parser.add_argument("--watch", type=int, metavar="SESSION",
+                        help="spectate a server session")
+    parser.add_argument("--join", type=int, metavar="SESSION",
+                        help="control the player of a server session")
+    return parser
+
+
+def main():
+    args = create_parser().parse_args()
+    curses.wrapper(lambda screen: asyncio.run(run(screen, args)))
+
+
+if __name__ == "__main__":
+    main()
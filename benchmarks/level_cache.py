@@ -0,0 +1,40 @@
+from application.level_cache import LevelCache
+from application.level import create_level
+from application.game import Game
+
+import tempfile
+import argparse
+import time
+
+
+def measure(action):
+    started = time.perf_counter()
+    result = action()
+    return result, (time.perf_counter() - started) * 1000
+
+
+def main():
+    args = create_parser().parse_args()
+    with tempfile.TemporaryDirectory() as directory:
+        for size in args.sizes:
+            _, generate_ms = measure(lambda: create_level(size, args.seed))
+            LevelCache(directory).get(size, args.seed)
+            cached, cached_ms = measure(
+                lambda: LevelCache(directory).get(size, args.seed))
+            _, start_ms = measure(lambda: Game(size).start(cached))
+            print(f"{size}x{size}: generate {generate_ms:.1f} ms, "
+                  f"cached load {cached_ms:.3f} ms, "
+                  f"Game.start {start_ms:.1f} ms")
+
+
+def create_parser():
+    parser = argparse.ArgumentParser(
+        description="Compare level generation with cached loads")
+    parser.add_argument("--sizes", type=int, nargs="+",
+                        default=[13, 32, 64, 128])
+    parser.add_argument("--seed", type=int, default=1)
+    return parser
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+from application.level_file import LevelData, read, write, encode_cells
+from application.level import CellState, STATES, player_base
+from application.game import Game
+
+import tempfile
+import argparse
+import random
+import time
+import gc
+import os
+
+
+def synthetic_level(size, seed):
+    # Same wall and grass density as create_level on a 13x13 board,
+    # which is too slow to generate the larger sizes.
+    rng = random.Random(seed)
+    states = [CellState.Empty, CellState.BrickWall,
+              CellState.ConcreteWall, CellState.Terrain]
+    codes = [state.value for state in states]
+    cells = bytearray(rng.choices(codes, [124, 26, 13, 6], k=size * size))
+    for row, column in player_base(size):
+        cells[row * size + column] = CellState.Empty.value
+    row, column = player_base(size)[0]
+    cells[row * size + column] = CellState.Player.value
+    cells[(size - 1) * size + size // 2] = CellState.PlayerFlag.value
+    return LevelData(size, seed, bytes(cells))
+
+
+def rows(level):
+    size = level.size
+    return [[STATES[code] for code in level.cells[y * size:(y + 1) * size]]
+            for y in range(size)]
+
+
+def measure(action):
+    started = time.perf_counter()
+    result = action()
+    return result, (time.perf_counter() - started) * 1000
+
+
+def paused_gc(action):
+    # Loading only allocates, so cyclic collections meanwhile are wasted
+    # work that grows with the board. Game leaves this to the caller.
+    gc.disable()
+    try:
+        return action()
+    finally:
+        gc.enable()
+
+
+def main():
+    args = create_parser().parse_args()
+    with tempfile.TemporaryDirectory() as directory:
+        for size in args.sizes:
+            level = synthetic_level(size, args.seed)
+            grid = rows(level)
+            path = os.path.join(directory, f"{size}.bcl")
+            written = write(path, level)
+
+            _, grid_ms = measure(lambda: Game(size).start(grid))
+            loaded, read_ms = measure(lambda: read(path))
+            _, start_ms = measure(lambda: Game(size).start(loaded))
+            _, paused_ms = measure(
+                lambda: paused_gc(lambda: Game(size).start(loaded)))
+            assert bytes(loaded.cells) == encode_cells(level)
+
+            print(f"{size}x{size}: file {written} bytes "
+                  f"({written / (size * size):.3f} per cell), "
+                  f"enum grid start {grid_ms:.1f} ms, "
+                  f"file read {read_ms:.1f} ms + start {start_ms:.1f} ms "
+                  f"({paused_ms:.1f} ms with gc paused)")
+
+
+def create_parser():
+    parser = argparse.ArgumentParser(
+        description="Measure compact level file size and load time")
+    parser.add_argument("--sizes", type=int, nargs="+",
+                        default=[13, 64, 256, 1024, 2048])
+    parser.add_argument("--seed", type=int, default=1)
+    return parser
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,36 @@
+from application.level import create_level, connected, key_points, CellState
+
+import argparse
+import time
+
+
+def measure(action):
+    started = time.perf_counter()
+    result = action()
+    return result, (time.perf_counter() - started) * 1000
+
+
+def main():
+    args = create_parser().parse_args()
+    for size in args.sizes:
+        level, generate_ms = measure(lambda: create_level(size, args.seed))
+        walls = [index for index, code in enumerate(level.cells)
+                 if code == CellState.ConcreteWall.value]
+        _, check_ms = measure(
+            lambda: connected(size, walls, key_points(size)))
+        print(f"{size}x{size}: generate {generate_ms:.1f} ms "
+              f"({generate_ms * 1e6 / (size * size):.1f} ns/cell), "
+              f"connectivity check {check_ms:.2f} ms")
+
+
+def create_parser():
+    parser = argparse.ArgumentParser(
+        description="Time level generation on growing boards")
+    parser.add_argument("--sizes", type=int, nargs="+",
+                        default=[13, 64, 256, 1024, 2048, 4096])
+    parser.add_argument("--seed", type=int, default=1)
+    return parser
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,162 @@
+import os
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from application.game import Game
+from application.level import CellState, create_level
+from application.level_file import LevelData
+from application.renderer import Renderer, Camera
+
+from PyQt5.QtWidgets import QApplication
+from PyQt5.QtGui import QImage, QPainter
+from PyQt5.QtCore import Qt
+
+import argparse
+import random
+import time
+import sys
+import numpy
+
+
+GOLDEN = os.path.join(os.path.dirname(__file__), "golden")
+WIDTH = 850
+HEIGHT = 750
+
+
+def blank_cells(size):
+    cells = bytearray([CellState.Empty.value]) * (size * size)
+    cells[(size - 1) * size + size // 2] = CellState.PlayerFlag.value
+    cells[(size - 1) * size + size // 2 - 2] = CellState.Player.value
+    return cells
+
+
+def play(game, scale, ticks, fire_every):
+    # The renderer sees every step, as in the window, so explosions
+    # and flashes from recent ticks are still on screen.
+    renderer = Renderer(scale, Camera())
+    for tick in range(ticks):
+        renderer.capture(game)
+        game.update(None, tick % fire_every == 0)
+    return game, renderer
+
+
+def empty_scene():
+    level = LevelData(13, None, blank_cells(13))
+    return play(Game(size=13, seed=1).start(level), 50, 0, 1)
+
+
+def level_scene():
+    game = Game(size=13, seed=1).start(create_level(13, 4))
+    return play(game, 50, 150, 40)
+
+
+def battle_scene(tanks=200, size=32):
+    # Every cell of the board is on screen at this scale.
+    cells = blank_cells(size)
+    free = list(range((size - 2) * size))
+    picker = random.Random(1)
+    for index in picker.sample(free, tanks):
+        cells[index] = picker.choice([CellState.PatrollingEnemy.value,
+                                      CellState.HauntingEnemy.value])
+    for index in picker.sample(
+            [index for index in free if cells[index] == CellState.Empty.value],
+            size * 4):
+        cells[index] = CellState.BrickWall.value
+    game = Game(size=size, seed=1).start(LevelData(size, None, cells))
+    return play(game, 20, 100, 8)
+
+
+SCENES = {
+    "empty": empty_scene,
+    "level": level_scene,
+    "battle": battle_scene
+}
+
+
+def render(renderer, game, alpha=1.0, image=None):
+    if image is None:
+        image = QImage(WIDTH, HEIGHT, QImage.Format_ARGB32_Premultiplied)
+    image.fill(Qt.black)
+    painter = QPainter(image)
+    renderer.paint(painter, game, alpha)
+    painter.end()
+    return image
+
+
+def differing_pixels(image, golden):
+    if image.size() != golden.size():
+        return image.width() * image.height()
+    arrays = list()
+    for frame in [image, golden]:
+        frame = frame.convertToFormat(QImage.Format_ARGB32)
+        bits = frame.constBits()
+        bits.setsize(frame.sizeInBytes())
+        arrays.append(numpy.frombuffer(bits, numpy.uint32).copy())
+    return int(numpy.count_nonzero(arrays[0] != arrays[1]))
+
+
+def measure(name, game, scale, frames):
+    renderer = Renderer(scale, Camera())
+    image = QImage(WIDTH, HEIGHT, QImage.Format_ARGB32_Premultiplied)
+    started = time.perf_counter()
+    render(renderer, game, 1.0, image)
+    first = time.perf_counter() - started
+
+    # Sweep alpha so every frame moves the interpolated sprites.
+    renderer.capture(game)
+    game.update()
+    started = time.perf_counter()
+    for frame in range(frames):
+        render(renderer, game, (frame % 16 + 1) / 16, image)
+    elapsed = time.perf_counter() - started
+    sprites = len(renderer.moving_sprites(game))
+    print(f"{name}: {sprites} moving sprites, first frame "
+          f"{first * 1000:.2f} ms, {frames / elapsed:.0f} fps "
+          f"({elapsed / frames * 1000:.3f} ms/frame)")
+
+
+def check(name, game, renderer, update):
+    image = render(renderer, game)
+    path = os.path.join(GOLDEN, f"{name}.png")
+    if update:
+        os.makedirs(GOLDEN, exist_ok=True)
+        image.save(path)
+        print(f"{name}: golden frame written to {path}")
+        return True
+    golden = QImage(path)
+    if golden.isNull():
+        print(f"{name}: no golden frame at {path}")
+        return False
+    pixels = differing_pixels(image, golden)
+    if pixels:
+        print(f"{name}: {pixels} pixels differ from {path}")
+    else:
+        print(f"{name}: matches golden frame")
+    return not pixels
+
+
+def main():
+    args = create_parser().parse_args()
+    app = QApplication.instance() or QApplication(sys.argv[:1])
+    matched = True
+    for name in args.scenes:
+        game, renderer = SCENES[name]()
+        matched &= check(name, game, renderer, args.update_golden)
+        if args.frames:
+            measure(name, game, renderer.scale, args.frames)
+    app.quit()
+    return 0 if matched else 1
+
+
+def create_parser():
+    parser = argparse.ArgumentParser(
+        description="Render standard scenes offscreen, time them and "
+                    "compare them with golden frames")
+    parser.add_argument("--scenes", nargs="+", choices=list(SCENES),
+                        default=list(SCENES))
+    parser.add_argument("--frames", type=int, default=300)
+    parser.add_argument("--update-golden", action="store_true")
+    return parser
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,63 @@
+from application.save import dump, load, SaveSlots
+from application.policy import HunterPolicy
+from application.game import Game
+from application.level import create_level
+
+from copy import deepcopy
+import tempfile
+import argparse
+import pickle
+import time
+
+
+def measure(action, repeat):
+    started = time.perf_counter()
+    for _ in range(repeat):
+        action()
+    return (time.perf_counter() - started) / repeat * 1000
+
+
+def main():
+    args = create_parser().parse_args()
+    game = Game(size=args.size)
+    game.start(create_level(args.size, args.seed))
+    player = HunterPolicy()
+    for _ in range(args.steps):
+        game.step(*player(game))
+
+    data = dump(game)
+    copied = deepcopy(game)
+    print(f"map {args.size}x{args.size}, "
+          f"{len(game.map.get_enemies())} enemies, "
+          f"{len(game.player.bullets)} player bullets")
+    print(f"size: snapshot {len(data)} bytes, "
+          f"pickled object graph {len(pickle.dumps(game))} bytes")
+    print(f"save: deepcopy {measure(lambda: deepcopy(game), args.repeat):.3f}"
+          f" ms, dump {measure(lambda: dump(game), args.repeat):.3f} ms")
+    copy = measure(lambda: deepcopy(copied), args.repeat)
+    print(f"load: deepcopy {copy:.3f} ms, "
+          f"load {measure(lambda: load(data), args.repeat):.3f} ms")
+
+    with tempfile.TemporaryDirectory() as directory:
+        slots = SaveSlots(directory)
+        caller = measure(lambda: slots.save(0, game), args.repeat)
+        started = time.perf_counter()
+        slots.flush()
+        flushed = (time.perf_counter() - started) * 1000
+        print(f"slot save: {caller:.3f} ms on the caller thread, "
+              f"background queue drained {flushed:.1f} ms later")
+
+
+def create_parser():
+    parser = argparse.ArgumentParser(
+        description="Compare binary snapshots with deepcopy saves")
+    parser.add_argument("--size", type=int, default=13)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--steps", type=int, default=200,
+                        help="Hunter steps played before measuring")
+    parser.add_argument("--repeat", type=int, default=200)
+    return parser
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+from application.server import GameServer, GameClient
+from application.policy import RandomPolicy
+
+import argparse
+import asyncio
+import time
+
+
+def measure_ticks(args):
+    server = GameServer(size=args.size)
+    players = list()
+    for i in range(args.sessions):
+        session = server.create_session([args.seed + i])
+        players.append((session, RandomPolicy(i)))
+    full = len(players[0][0].full_message())
+
+    sent = 0
+    elapsed = 0
+    for _ in range(args.ticks):
+        for session, player in players:
+            session.input = player(session.game)
+        started = time.perf_counter()
+        for session, _ in players:
+            sent += len(session.tick() or b"")
+        elapsed += time.perf_counter() - started
+
+        for i, (session, player) in enumerate(players):
+            if session.finished:
+                players[i] = (server.create_session([session.id]), player)
+
+    per_session = elapsed / (args.ticks * args.sessions)
+    print(f"{args.sessions} sessions, {args.ticks} ticks: "
+          f"{per_session * 1e6:.1f} us per session tick, "
+          f"{server.tick_seconds / per_session:.0f} sessions per core "
+          f"at {1 / server.tick_seconds:.0f} Hz")
+    delta = sent / (args.ticks * args.sessions)
+    print(f"bytes per session tick: delta {delta:.1f}, full frame {full}")
+
+
+async def measure_network(args):
+    server = await GameServer(size=args.size).start()
+    clients = list()
+    for i in range(args.clients):
+        client = await GameClient.connect(port=server.port)
+        await client.create([args.seed + i])
+        client.send_input(None, True)
+        clients.append(client)
+
+    async def read(client):
+        while True:
+            await client.receive()
+
+    readers = [asyncio.ensure_future(read(c)) for c in clients]
+    started_ticks = server.ticks
+    started = time.perf_counter()
+    await asyncio.sleep(args.seconds)
+    elapsed = time.perf_counter() - started
+    ticks = server.ticks - started_ticks
+
+    for reader in readers:
+        reader.cancel()
+    received = sum(client.received for client in clients)
+    for client in clients:
+        await client.close()
+    await server.close()
+    print(f"{args.clients} TCP clients: {ticks / elapsed:.0f} ticks/s, "
+          f"{server.overruns} overruns, "
+          f"{received / max(ticks, 1) / args.clients:.1f} "
+          f"bytes per client tick")
+
+
+def main():
+    args = create_parser().parse_args()
+    measure_ticks(args)
+    if args.clients:
+        asyncio.run(measure_network(args))
+
+
+def create_parser():
+    parser = argparse.ArgumentParser(
+        description="Measure game server capacity and bandwidth")
+    parser.add_argument("--size", type=int, default=13)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--sessions", type=int, default=100)
+    parser.add_argument("--ticks", type=int, default=500)
+    parser.add_argument("--clients", type=int, default=20,
+                        help="sessions played over loopback TCP")
+    parser.add_argument("--seconds", type=float, default=3)
+    return parser
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+from application.shared_state import StateWriter, StateReader, frame_size
+from application.game import Game
+from application.level import create_level
+
+from multiprocessing import Process, Queue
+import argparse
+import pickle
+import time
+
+
+def read_frames(name, seconds, results):
+    reader = StateReader(name)
+    frame = None
+    reads = 0
+    frames = 0
+    last = -1
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        frame = reader.read(frame)
+        reads += 1
+        if frame.sequence != last:
+            frames += 1
+            last = frame.sequence
+    results.put((reads, frames, reader.retries))
+    frame = None
+    reader.close()
+
+
+def main():
+    args = create_parser().parse_args()
+    game = Game(size=args.size)
+    game.start(create_level(args.size, args.seed))
+
+    started = time.perf_counter()
+    for _ in range(args.frames):
+        pickle.dumps(game)
+    pickle_rate = args.frames / (time.perf_counter() - started)
+
+    writer = StateWriter(args.size)
+    results = Queue()
+    reader = Process(target=read_frames,
+                     args=(writer.name, args.seconds, results))
+    reader.start()
+    time.sleep(0.2)
+
+    publishes = 0
+    deadline = time.perf_counter() + args.seconds - 0.4
+    started = time.perf_counter()
+    while time.perf_counter() < deadline:
+        writer.publish(game)
+        publishes += 1
+    publish_rate = publishes / (time.perf_counter() - started)
+
+    reads, frames, retries = results.get()
+    reader.join()
+    writer.close()
+
+    size = frame_size(args.size, writer.capacity)
+    print(f"map {args.size}x{args.size}, frame buffer {size} bytes")
+    print(f"pickle.dumps(game): {pickle_rate:.0f} frames/s")
+    print(f"publish: {publish_rate:.0f} frames/s")
+    print(f"reader: {reads / args.seconds:.0f} reads/s, "
+          f"{frames} distinct frames, {retries} seqlock retries")
+
+
+def create_parser():
+    parser = argparse.ArgumentParser(
+        description="Measure shared-memory state export throughput")
+    parser.add_argument("--size", type=int, default=13)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--seconds", type=float, default=2.0)
+    parser.add_argument("--frames", type=int, default=2000,
+                        help="Frames for the pickle baseline")
+    return parser
+
+
+if __name__ == "__main__":
+    main()
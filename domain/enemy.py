@@ -1,4 +1,5 @@
 from domain.tank import Tank
+from domain.infrastructure.clock import SystemClock
 from enum import Enum
 
 
@@ -10,8 +11,9 @@ class EnemyType(Enum):
 
 
 class Enemy(Tank):
-    def __init__(self, _type, location, direction, health):
-        super().__init__(location, direction, health)
+    def __init__(self, _type, location, direction, health,
+                 clock=SystemClock()):
+        super().__init__(location, direction, health, clock=clock)
         self.type = _type
         self.directions = list()
         self.shoot_count = 0
@@ -0,0 +1,20 @@
+import datetime
+
+
+class Clock:
+    def __init__(self, tick=datetime.timedelta(milliseconds=10)):
+        self.tick = tick
+        self.ticks = 0
+        self.epoch = datetime.datetime(2000, 1, 1)
+
+    def now(self):
+        return self.epoch + self.tick * self.ticks
+
+    def advance(self, ticks=1):
+        self.ticks += ticks
+
+
+class SystemClock:
+    @staticmethod
+    def now():
+        return datetime.datetime.now()
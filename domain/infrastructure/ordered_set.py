@@ -0,0 +1,23 @@
+class OrderedSet(dict):
+    def __init__(self, items=()):
+        super().__init__()
+        if items:
+            self.update(dict.fromkeys(items))
+
+    def add(self, item):
+        self[item] = None
+
+    def remove(self, item):
+        del self[item]
+
+    def discard(self, item):
+        dict.pop(self, item, None)
+
+    def pop(self):
+        return self.popitem()[0]
+
+    def copy(self):
+        return OrderedSet(self)
+
+    def __repr__(self):
+        return f"{type(self).__name__}({list(self)})"
@@ -2,65 +2,121 @@ from domain.enemy import Enemy
 from domain.bonus import Bonus
 from domain.flag import Flag
 from .infrastructure.geometry import Point
+from .infrastructure.ordered_set import OrderedSet
+
+
+class Cell(OrderedSet):
+    def __init__(self, objs=(), _map=None, location=None):
+        super().__init__(objs)
+        self._owner = _map
+        self.location = location
+
+    def add(self, obj):
+        if obj not in self:
+            super().add(obj)
+            self._owner.register(obj, self.location)
+
+    def remove(self, obj):
+        super().remove(obj)
+        self._owner.unregister(obj, self.location)
+
+    def discard(self, obj):
+        if obj in self:
+            self.remove(obj)
+
+    def pop(self):
+        obj = super().pop()
+        self._owner.unregister(obj, self.location)
+        return obj
+
+    def clear(self):
+        for obj in list(self):
+            self.remove(obj)
 
 
 class Map:
     def __init__(self, size):
         self.size = size
-        self._map = {
-            Point(x, y): set()
-            for x in range(size)
-            for y in range(size)
-        }
+        self._map = dict()
+        self._objects = dict()
+        self._trackers = list()
 
     def __getitem__(self, key):
-        return self._map[key]
+        cell = self._map.get(key)
+        if cell is None:
+            if not self.check_coords(key):
+                raise KeyError(key)
+            cell = self._map[key] = Cell(_map=self, location=key)
+        return cell
+
+    def objects_at(self, location):
+        return self._map.get(location, ())
 
     def __iter__(self):
-        return iter(self._map)
+        return (
+            Point(x, y)
+            for x in range(self.size)
+            for y in range(self.size)
+        )
+
+    def register(self, obj, location):
+        objects = self._objects.setdefault(type(obj), dict())
+        objects[obj] = objects.get(obj, 0) + 1
+        for changes in self._trackers:
+            changes.add(location)
+
+    def unregister(self, obj, location):
+        objects = self._objects[type(obj)]
+        objects[obj] -= 1
+        if objects[obj] == 0:
+            del objects[obj]
+        for changes in self._trackers:
+            changes.add(location)
+
+    def track_changes(self):
+        changes = set()
+        self._trackers.append(changes)
+        return changes
+
+    def untrack_changes(self, changes):
+        self._trackers = [
+            tracker for tracker in self._trackers
+            if tracker is not changes
+        ]
+
+    def get_objects(self, *types):
+        objs = list()
+        for _type in types:
+            objs.extend(self._objects.get(_type, ()))
+        return objs
 
     def get_enemies(self):
-        enemies = list()
-        for location in self._map.values():
-            for obj in location:
-                if isinstance(obj, Enemy):
-                    enemies.append(obj)
-        return enemies
+        return self.get_objects(Enemy)
 
     def get_flag(self):
-        for location in self._map.values():
-            for obj in location:
-                if isinstance(obj, Flag):
-                    return obj
+        for flag in self._objects.get(Flag, ()):
+            return flag
 
     def get_bonuses(self):
-        bonuses = list()
-        for location in self._map.values():
-            for obj in location:
-                if isinstance(obj, Bonus):
-                    bonuses.append(obj)
-        return bonuses
+        return self.get_objects(Bonus)
 
     def cell_types(self, location):
         _types = {
             type(x)
-            for x in self._map[location]
+            for x in self[location]
         }
         return _types
 
     def get_obj_by_type(self, location, _type):
-        for obj in self._map[location]:
+        for obj in self[location]:
             if type(obj) == _type:
                 return obj
 
     def swap(self, obj, location):
-        if obj in self._map[obj.location]:
-            self._map[obj.location].remove(obj)
-        self._map[location].add(obj)
+        if obj in self[obj.location]:
+            self[obj.location].remove(obj)
+        self[location].add(obj)
 
     def check_coords(self, coords):
-        try:
-            self._map[coords]
-        except KeyError:
-            return False
-        return True
+        return (0 <= coords.x < self.size and
+                0 <= coords.y < self.size)
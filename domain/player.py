@@ -1,12 +1,12 @@
 from domain.tank import Tank
 from domain.bonus import BonusType
 from domain.infrastructure.geometry import Direction
-import datetime
+from domain.infrastructure.clock import SystemClock
 
 
 class Player(Tank):
-    def __init__(self, location, direction, health):
-        super().__init__(location, direction, health)
+    def __init__(self, location, direction, health, clock=SystemClock()):
+        super().__init__(location, direction, health, clock=clock)
         self.cheat = 0
         self.invulnerability = None
         self.speed_runner = None
@@ -19,14 +19,14 @@ class Player(Tank):
                 self.health += 1
         elif bonus.type == BonusType.Invulnerability:
             if not self.armor:
-                self.invulnerability = datetime.datetime.now()
+                self.invulnerability = self.clock.now()
         elif bonus.type == BonusType.Armor:
             if not self.invulnerability:
                 self.armor = True
         elif bonus.type == BonusType.SpeedRunner:
-            self.speed_runner = datetime.datetime.now()
+            self.speed_runner = self.clock.now()
         elif bonus.type == BonusType.FastShooting:
-            self.fast_shooting = datetime.datetime.now()
+            self.fast_shooting = self.clock.now()
 
     def recover(self, location):
         self.health = 3
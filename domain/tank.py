@@ -1,17 +1,21 @@
 from .infrastructure.geometry import Direction, Point
 from .infrastructure.move_obj import IMoveObject
 from .bullet import Bullet, BulletType
+from .infrastructure.clock import SystemClock
+from .infrastructure.ordered_set import OrderedSet
 import datetime
 
 
 class Tank(IMoveObject):
     def __init__(self, location, direction, health,
-                 shoot_delay=datetime.timedelta(milliseconds=600)):
+                 shoot_delay=datetime.timedelta(milliseconds=600),
+                 clock=SystemClock()):
         super().__init__(location, direction)
+        self.clock = clock
         self.shoot_delay = shoot_delay
         self.last_shoot = None
         self.health = health
-        self.bullets = set()
+        self.bullets = OrderedSet()
         self.level = 1
 
     def get_bullet_type(self):
@@ -27,23 +31,24 @@ class Tank(IMoveObject):
         bullet_type = self.get_bullet_type()
         bullet = Bullet(location, direction, self, bullet_type)
         self.bullets.add(bullet)
-        self.last_shoot = datetime.datetime.now()
+        self.last_shoot = self.clock.now()
         return bullet
 
+    def can_shoot(self, now):
+        return (not self.last_shoot or
+                now - self.last_shoot > self.shoot_delay)
+
     def shoot(self):
-        if not self.last_shoot or \
-                datetime.datetime.now() - self.last_shoot > self.shoot_delay:
+        if self.can_shoot(self.clock.now()):
             return self._shoot(self.direction)
 
     def cheat_shoot(self):
-        if not self.last_shoot or \
-                datetime.datetime.now() - self.last_shoot > self.shoot_delay:
+        if self.can_shoot(self.clock.now()):
             return self._shoot(self.direction), \
                    self._shoot(self.opposite_direction())
 
     def imba_shoot(self):
-        if not self.last_shoot or \
-                datetime.datetime.now() - self.last_shoot > self.shoot_delay:
+        if self.can_shoot(self.clock.now()):
             return self._shoot(Direction.Up), \
                    self._shoot(Direction.Down), \
                    self._shoot(Direction.Left), \
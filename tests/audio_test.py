@@ -0,0 +1,44 @@
+import unittest
+from application.audio import AudioBank, SOUNDS
+
+
+class FakeVoice:
+    def __init__(self, path):
+        self.path = path
+        self.playing = False
+
+    def isPlaying(self):
+        return self.playing
+
+    def play(self):
+        self.playing = True
+
+
+class AudioBankTests(unittest.TestCase):
+    def setUp(self):
+        self.bank = AudioBank(SOUNDS, {"fire": 2}, FakeVoice)
+
+    def test_preloads_every_sound(self):
+        for name in ["fire", "start", "boom", "end", "bonus", "brick", "win"]:
+            self.assertIn(name, self.bank)
+        self.assertEqual(2, len(self.bank.voices["fire"]))
+        self.assertEqual(1, len(self.bank.voices["boom"]))
+
+    def test_identical_triggers_coalesce(self):
+        for _ in range(4):
+            self.bank.trigger("fire")
+        self.bank.trigger("boom")
+        self.bank.flush()
+        self.assertEqual(2, self.bank.played)
+        self.assertEqual([True, False],
+                         [v.playing for v in self.bank.voices["fire"]])
+
+    def test_busy_voices_drop_triggers(self):
+        for _ in range(3):
+            self.bank.play("fire")
+        self.assertEqual(2, self.bank.played)
+        self.assertEqual(1, self.bank.dropped)
+
+        self.bank.voices["fire"][0].playing = False
+        self.bank.play("fire")
+        self.assertEqual(3, self.bank.played)
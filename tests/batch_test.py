@@ -0,0 +1,35 @@
+import unittest
+import tempfile
+import json
+import os
+from application.batch import run_game, run_batch, write_results
+
+
+class BatchTests(unittest.TestCase):
+    def test_hunter_finishes_game(self):
+        result = run_game(1, policy="hunter")
+        self.assertIn(result["outcome"], ["win", "lose"])
+        self.assertEqual(result["score"], result["kills"])
+        self.assertTrue(result["ticks"] > 0)
+
+    def test_idle_player_times_out(self):
+        result = run_game(1, policy="idle", max_ticks=160)
+        self.assertEqual("timeout", result["outcome"])
+
+    def test_results_do_not_depend_on_worker_count(self):
+        def outcomes(results):
+            return [(r["seed"], r["outcome"], r["ticks"], r["score"])
+                    for r in results]
+
+        seeds = [1, 2, 3]
+        single, _ = run_batch(seeds, "random", 1, max_ticks=3000)
+        pool, _ = run_batch(seeds, "random", 2, max_ticks=3000)
+        self.assertEqual(outcomes(single), outcomes(pool))
+
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "results.jsonl")
+            write_results(single, path)
+            with open(path) as file:
+                lines = [json.loads(line) for line in file]
+        self.assertEqual(3, len(lines))
+        self.assertEqual(1, lines[0]["workers"])
@@ -0,0 +1,36 @@
+import unittest
+import numpy as np
+from application.env import BattleCityEnv, VecEnv, CHANNELS, ACTIONS
+
+
+class EnvTests(unittest.TestCase):
+    def test_reset_is_reproducible_for_seed(self):
+        env = BattleCityEnv()
+        first, info = env.reset(seed=7)
+        second, _ = env.reset(seed=7)
+        self.assertEqual(7, info["seed"])
+        self.assertEqual((len(CHANNELS), 13, 13), first.shape)
+        self.assertTrue(np.array_equal(first, second))
+        self.assertEqual(1, first[CHANNELS.index("player")].sum())
+        self.assertEqual(1, first[CHANNELS.index("flag")].sum())
+
+    def test_step_advances_game(self):
+        env = BattleCityEnv()
+        env.reset(seed=7)
+        obs, reward, terminated, truncated, info = env.step(
+            ACTIONS.index((None, True)))
+        self.assertEqual(env.observation_shape, obs.shape)
+        self.assertEqual(16, info["ticks"])
+        self.assertFalse(terminated)
+
+    def test_vec_env_batches_observations(self):
+        env = VecEnv(3, max_steps=2)
+        obs, infos = env.reset(seeds=[1, 2, 3])
+        self.assertEqual((3, len(CHANNELS), 13, 13), obs.shape)
+
+        for _ in range(2):
+            obs, rewards, terminated, truncated, infos = \
+                env.step(np.zeros(3, dtype=int))
+        self.assertEqual((3,), rewards.shape)
+        self.assertTrue(truncated.all())
+        self.assertIn("final_observation", infos[0])
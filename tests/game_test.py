@@ -7,6 +7,7 @@ from domain.infrastructure.geometry import Point, Direction
 from domain.bullet import Bullet, BulletType
 from domain.bonus import Bonus, BonusType
 from domain.enemy import Enemy
+from domain.boom import BoomType
 
 from unittest.mock import Mock
 
@@ -36,6 +37,31 @@ class GameTests(unittest.TestCase):
         game.move_player(Direction.Right)
         self.assertEqual(Point(1, 1), game.player.location)
 
+    def test_explosions_are_reported_not_placed(self):
+        game = Game(size=3).start([
+            [cs.Empty, cs.BrickWall, cs.Empty],
+            [cs.Empty, cs.Player, cs.PatrollingEnemy],
+            [cs.Empty, cs.Empty, cs.Empty]
+        ])
+
+        game.player.shoot_delay = datetime.timedelta(milliseconds=-1)
+        game.player.direction = Direction.Up
+        self.assertTrue(game.shoot())
+        game.move_player_bullets()
+        game.player.direction = Direction.Right
+        self.assertTrue(game.shoot())
+        game.move_player_bullets()
+
+        self.assertEqual([(Point(1, 0), BoomType.Wall),
+                          (Point(2, 1), BoomType.Small)],
+                         [(boom.location, boom.type) for boom in game.booms])
+        self.assertEqual(["brick", "boom"], game.events)
+        self.assertEqual(0, len(game.map[Point(1, 0)]))
+        self.assertEqual(0, len(game.map[Point(2, 1)]))
+
+        game.update()
+        self.assertEqual([], game.booms)
+
     def test_player_not_move_if_wall_next(self):
         game = Game(size=3).start([
             [cs.Empty, cs.BrickWall, cs.Empty],
@@ -216,6 +242,42 @@ class GameTests(unittest.TestCase):
         self.assertTrue(game.player.health == 3)
         self.assertTrue(game.player.location == Point(2, 2))
 
+    def test_fast_forward_matches_tick_by_tick_update(self):
+        def play(fast):
+            game = Game(seed=10)
+            level = Level(game.size, 10) \
+                .with_brick_walls(game.size * 2) \
+                .with_concrete_walls(game.size) \
+                .with_terrains(game.size // 2) \
+                .with_patrolling_enemies(1) \
+                .with_haunting_enemies(1)
+            game.start(level)
+            for direction in [Direction.Up, None, Direction.Left, None]:
+                if fast:
+                    game.fast_forward(500, direction, fire=True)
+                else:
+                    for _ in range(500):
+                        if game.status == GameStatus.Process:
+                            game.update(direction, fire=True)
+            return (game.clock.ticks, game.score, game.status,
+                    game.player.location, game.player.health,
+                    sorted((e.location.x, e.location.y)
+                           for e in game.map.get_enemies()))
+
+        self.assertEqual(play(fast=False), play(fast=True))
+
+    def test_idle_ticks_skip_to_next_game_tick(self):
+        game = Game(size=3).start([
+            [cs.Empty, cs.Empty, cs.Empty],
+            [cs.Empty, cs.Player, cs.Empty],
+            [cs.Empty, cs.Empty, cs.Empty]
+        ])
+
+        self.assertEqual(game.game_speed - 1, game.idle_ticks())
+        self.assertEqual(game.game_speed, game.step())
+        self.assertEqual(0, game.count)
+        self.assertEqual(0, game.idle_ticks(fire=True))
+
     def test_game_end_if_and_only_if_when_flag_not_exists(self):
         mock = Mock()
         mock.get_player_base = Mock(return_value=[(0, 0)])
@@ -0,0 +1,54 @@
+import unittest
+from application.governor import FrameGovernor, LEVELS, SETTLE, HUD_PERIOD
+
+
+class FrameGovernorTests(unittest.TestCase):
+    def run_frames(self, governor, count, used):
+        for _ in range(count):
+            governor.simulation = used * governor.budget / 2
+            governor.painting = used * governor.budget / 2
+            governor.frame()
+
+    def overload(self, governor):
+        frames = 0
+        level = governor.level
+        while governor.level == level:
+            self.run_frames(governor, 1, 1.5)
+            frames += 1
+        return frames
+
+    def test_steps_down_quality_under_load(self):
+        governor = FrameGovernor(0.016)
+        self.run_frames(governor, 200, 0.3)
+        self.assertEqual(0, governor.level)
+        self.assertTrue(governor.interpolate)
+
+        self.assertLess(self.overload(governor), 20)
+        self.assertEqual(1, governor.level)
+        self.assertFalse(governor.interpolate)
+        self.assertTrue(governor.hud_due())
+        self.assertEqual(SETTLE + 1, self.overload(governor))
+
+        self.run_frames(governor, 5 * SETTLE, 1.5)
+        self.assertEqual(len(LEVELS) - 1, governor.level)
+        hud = paint = 0
+        for _ in range(HUD_PERIOD * 2):
+            self.run_frames(governor, 1, 1.5)
+            hud += governor.hud_due()
+            paint += governor.paint_due()
+        self.assertEqual(2, hud)
+        self.assertEqual(HUD_PERIOD, paint)
+
+    def test_recovers_after_calm_period(self):
+        governor = FrameGovernor(0.016, hold=50)
+        self.overload(governor)
+        self.run_frames(governor, SETTLE + 49, 0.0)
+        self.assertEqual(1, governor.level)
+        self.run_frames(governor, 1, 0.0)
+        self.assertEqual(0, governor.level)
+
+    def test_moderate_load_keeps_level(self):
+        governor = FrameGovernor(0.016, hold=10)
+        self.overload(governor)
+        self.run_frames(governor, 500, 0.7)
+        self.assertEqual(1, governor.level)
@@ -0,0 +1,93 @@
+import unittest
+import threading
+import tempfile
+import os
+from application.game import Game
+from application.level import create_level, default_params
+from application.level_cache import LevelCache, LevelQueue, cache_key
+from application.save import dump
+
+
+class LevelCacheTests(unittest.TestCase):
+    def test_cached_level_matches_generated_one(self):
+        with tempfile.TemporaryDirectory() as directory:
+            cache = LevelCache(directory)
+            generated = cache.get(13, 7)
+            cached = LevelCache(directory).get(13, 7)
+            self.assertEqual((0, 1), (cache.hits, cache.misses))
+            self.assertIsInstance(cached.cells, memoryview)
+            self.assertEqual(7, cached.seed)
+
+            fresh = Game(seed=1).start(create_level(13, 7))
+            self.assertEqual(dump(fresh), dump(Game(seed=1).start(cached)))
+            self.assertEqual(dump(fresh),
+                             dump(Game(seed=1).start(generated)))
+
+    def test_key_depends_on_parameters(self):
+        params = default_params(13)
+        other = dict(params, terrains=0)
+        self.assertNotEqual(cache_key(13, 1, params),
+                            cache_key(13, 1, other))
+        self.assertNotEqual(cache_key(13, 1, params),
+                            cache_key(13, 2, params))
+
+    def test_damaged_entry_is_regenerated(self):
+        with tempfile.TemporaryDirectory() as directory:
+            cache = LevelCache(directory)
+            cache.get(13, 3)
+            path = cache.path(cache_key(13, 3, default_params(13)))
+            with open(path, "r+b") as file:
+                file.truncate(50)
+            level = cache.get(13, 3)
+            self.assertEqual(2, cache.misses)
+            self.assertEqual(18 + 13 * 13, os.path.getsize(path))
+            self.assertEqual(list(create_level(13, 3)), list(level))
+
+    def test_corrupt_cells_are_regenerated(self):
+        with tempfile.TemporaryDirectory() as directory:
+            cache = LevelCache(directory)
+            cache.get(13, 3)
+            path = cache.path(cache_key(13, 3, default_params(13)))
+            with open(path, "r+b") as file:
+                file.seek(18 + 40)
+                file.write(bytes([200]))
+            level = cache.get(13, 3)
+            self.assertEqual(2, cache.misses)
+            self.assertEqual(dump(Game(seed=1).start(create_level(13, 3))),
+                             dump(Game(seed=1).start(level)))
+            fresh = LevelCache(directory)
+            fresh.get(13, 3)
+            self.assertEqual(1, fresh.hits)
+
+    def test_unwritable_directory_still_gives_level(self):
+        with tempfile.TemporaryDirectory() as directory:
+            blocker = os.path.join(directory, "file")
+            with open(blocker, "wb"):
+                pass
+            cache = LevelCache(os.path.join(blocker, "levels"))
+            level = cache.get(13, 5)
+            self.assertEqual(1, cache.misses)
+            self.assertEqual(dump(Game(seed=1).start(create_level(13, 5))),
+                             dump(Game(seed=1).start(level)))
+
+
+class LevelQueueTests(unittest.TestCase):
+    def test_next_level_is_built_in_background(self):
+        loaded = list()
+        release = threading.Event()
+
+        def load(seed):
+            if loaded:
+                release.wait(5)
+            loaded.append(seed)
+            return create_level(13, seed)
+
+        levels = LevelQueue([4, 5, 6], load)
+        self.assertEqual(3, len(levels))
+        self.assertEqual(4, levels[0].seed)
+        self.assertFalse(levels.ready(1))
+        release.set()
+        self.assertEqual(5, levels[1].seed)
+        self.assertEqual(6, levels[2].seed)
+        self.assertEqual([4, 5, 6], loaded)
+        self.assertIs(levels[1], levels[1])
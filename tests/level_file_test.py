@@ -0,0 +1,43 @@
+import unittest
+import tempfile
+import random
+import os
+from application.game import Game
+from application.level import create_level
+from application.level_file import (
+    LevelFileError, dumps, loads, read, write)
+from application.save import dump
+
+
+class LevelFileTests(unittest.TestCase):
+    def test_round_trip_loads_the_same_game(self):
+        level = create_level(13, 10)
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "level.bcl")
+            write(path, level)
+            loaded = read(path)
+
+        self.assertEqual(13, loaded.size)
+        self.assertEqual(10, loaded.seed)
+        self.assertEqual(list(level), list(loaded))
+        self.assertEqual(dump(Game(seed=1).start(level)),
+                         dump(Game(seed=1).start(loaded)))
+
+    def test_large_level_streams_in_chunks(self):
+        level = loads(dumps(create_level(13, 3)))
+        level.size = 600
+        noise = random.Random(1).randbytes(600 * 600)
+        level.cells = bytes(code % 10 for code in noise)
+        loaded = loads(dumps(level, compression=1))
+        self.assertEqual(level.cells, bytes(loaded.cells))
+
+    def test_damaged_files_are_rejected(self):
+        data = dumps(create_level(13, 4))
+        with self.assertRaises(LevelFileError):
+            loads(data[:-4])
+        with self.assertRaises(LevelFileError):
+            loads(b"XXXX" + data[4:])
+        level = loads(data)
+        level.cells = bytes([10]) + bytes(level.cells[1:])
+        with self.assertRaises(LevelFileError):
+            loads(dumps(level))
@@ -0,0 +1,47 @@
+import unittest
+import random
+from unittest import mock
+from application.level import (
+    CellState, CellPool, Level, connected, key_points, create_level)
+
+
+class LevelTests(unittest.TestCase):
+    def test_pool_samples_every_free_cell_once(self):
+        rng = random.Random(1)
+        pool = CellPool(50)
+        for index in [0, 7, 49, 7]:
+            pool.discard(index)
+        sampled = [pool.sample(rng) for _ in range(len(pool))]
+        self.assertEqual(set(range(50)) - {0, 7, 49}, set(sampled))
+        self.assertEqual(47, len(sampled))
+
+    def test_wall_across_the_board_disconnects_bases(self):
+        size = 13
+        points = key_points(size)
+        wall = [5 * size + x for x in range(size)]
+        self.assertFalse(connected(size, wall, points))
+        self.assertTrue(connected(size, wall[1:], points))
+
+    def test_generated_levels_keep_counts_and_connectivity(self):
+        for seed in range(50):
+            level = create_level(13, seed)
+            cells = level.cells
+            walls = [index for index, code in enumerate(cells)
+                     if code == CellState.ConcreteWall.value]
+            self.assertEqual(13, len(walls))
+            self.assertTrue(connected(13, walls, key_points(13)))
+            self.assertEqual(list(level), list(create_level(13, seed)))
+
+    def test_cut_off_walls_are_placed_again(self):
+        level = Level(13, 1)
+        free = len(level._free_cells)
+        with mock.patch("application.level.connected",
+                        side_effect=[False, False, True]) as check:
+            level.with_concrete_walls(13)
+        self.assertEqual(3, check.call_count)
+        self.assertEqual(13, level.cells.count(CellState.ConcreteWall.value))
+        self.assertEqual(free - 13, len(level._free_cells))
+
+        with mock.patch("application.level.connected", return_value=False):
+            with self.assertRaises(ValueError):
+                Level(13, 1).with_concrete_walls(13)
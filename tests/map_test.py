@@ -0,0 +1,52 @@
+import unittest
+from application.game import Game
+from application.level import CellState as cs
+from domain.infrastructure.geometry import Point, Direction
+from domain.obstacle import Wall, WallType
+from domain.enemy import Enemy, EnemyType
+from domain.bonus import Bonus, BonusType
+from domain.player import Player
+from domain.map import Map
+
+
+class MapTests(unittest.TestCase):
+    def test_objects_index_follows_cells(self):
+        game_map = Map(3)
+        enemy = Enemy(EnemyType.Patrolling, Point(0, 0), Direction.Up, 1)
+        bonus = Bonus(Point(1, 1), BonusType.Heart)
+        game_map[enemy.location].add(enemy)
+        game_map[bonus.location].add(bonus)
+        self.assertEqual([enemy], game_map.get_enemies())
+        self.assertEqual([bonus], game_map.get_bonuses())
+
+        game_map.swap(enemy, Point(0, 1))
+        enemy.location = Point(0, 1)
+        self.assertEqual([enemy], game_map.get_enemies())
+        self.assertTrue(len(game_map[Point(0, 0)]) == 0)
+
+        game_map[bonus.location].remove(bonus)
+        game_map[enemy.location].clear()
+        self.assertEqual([], game_map.get_enemies())
+        self.assertEqual([], game_map.get_bonuses())
+
+    def test_huge_map_is_lazy(self):
+        game_map = Map(4096)
+        location = Point(4000, 17)
+        game_map[location].add(Wall(location, WallType.Brick))
+        self.assertTrue(game_map.check_coords(Point(4095, 4095)))
+        self.assertFalse(game_map.check_coords(Point(4096, 0)))
+        self.assertEqual(1, len(game_map.get_objects(Wall)))
+        with self.assertRaises(KeyError):
+            game_map[Point(-1, 0)]
+
+    def test_haunting_enemy_finds_player_on_large_map(self):
+        size = 200
+        level = [[cs.Empty] * size for _ in range(size)]
+        level[0][0] = cs.HauntingEnemy
+        level[size - 1][size - 1] = cs.Player
+        game = Game(size=size).start(level)
+
+        enemy = game.map.get_enemies()[0]
+        directions = game.ai.dfs(enemy, enemy.location, [], set())
+        self.assertTrue(directions)
+        self.assertIn(Player, game.map.cell_types(game.player.location))
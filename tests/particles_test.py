@@ -0,0 +1,38 @@
+import unittest
+from application.particles import ParticlePool, EMITTERS, FLASH
+from domain.boom import BoomType
+
+
+class ParticlePoolTests(unittest.TestCase):
+    def test_particles_age_and_return_to_the_pool(self):
+        pool = ParticlePool(capacity=8)
+        pool.emit(BoomType.Small, 3, 4, now=10)
+        self.assertEqual(2, len(pool))
+        self.assertEqual([("boom_1", 3, 4, 0.6, 1.0)], pool.frame(10))
+
+        name, x, y, scale, opacity = pool.frame(18)[0]
+        self.assertAlmostEqual(0.8, scale)
+        self.assertEqual(["boom_1", "boom_2"],
+                         [sprite[0] for sprite in pool.frame(24)])
+        self.assertEqual(["boom_2"], [sprite[0] for sprite in pool.frame(30)])
+        self.assertLess(pool.frame(40)[0][4], 0.2)
+
+        pool.update(26)
+        self.assertEqual(1, len(pool))
+        pool.update(42)
+        self.assertEqual(0, len(pool))
+        self.assertEqual(8, len(pool._free))
+
+    def test_full_pool_recycles_the_oldest(self):
+        pool = ParticlePool(capacity=3)
+        particles = set(pool._free)
+        for now in range(4):
+            pool.emit(FLASH, now, 0, now)
+        self.assertEqual(3, len(pool))
+        self.assertEqual(1, pool.recycled)
+        self.assertEqual([1, 2, 3], [p.x for p in pool.active])
+        self.assertEqual(particles, set(pool.active))
+
+    def test_every_boom_type_has_an_emitter(self):
+        for _type in BoomType:
+            self.assertIn(_type, EMITTERS)
@@ -0,0 +1,127 @@
+import unittest
+import os
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+from PyQt5.QtWidgets import QApplication
+from PyQt5.QtGui import QImage, QPainter
+from PyQt5.QtCore import Qt
+from application.game import Game
+from application.level import create_level
+from application.renderer import Camera, Renderer, STATIC_TYPES
+from domain.obstacle import Wall
+from domain.terrain import Grass
+from domain.boom import Boom, BoomType
+from domain.infrastructure.geometry import Direction
+
+APP = QApplication.instance() or QApplication([])
+
+
+def render(renderer, game):
+    image = QImage(850, 750, QImage.Format_ARGB32)
+    image.fill(Qt.black)
+    painter = QPainter(image)
+    renderer.paint(painter, game)
+    painter.end()
+    return image
+
+
+class RendererTests(unittest.TestCase):
+    def test_changed_cells_match_a_full_redraw(self):
+        game = Game(seed=1).start(create_level(13, 4))
+        renderer = Renderer()
+        render(renderer, game)
+        drawn = renderer.cells_drawn
+        self.assertEqual(drawn, len({
+            obj.location for obj in game.map.get_objects(*STATIC_TYPES)}))
+
+        wall = game.map.get_objects(Wall)[0]
+        game.map[wall.location].remove(wall)
+        self.assertEqual(render(Renderer(), game), render(renderer, game))
+
+        game.map[wall.location].add(Grass(wall.location))
+        self.assertEqual(render(Renderer(), game), render(renderer, game))
+        self.assertEqual(drawn + 2, renderer.cells_drawn)
+
+    def test_unchanged_frames_redraw_nothing(self):
+        game = Game(seed=1).start(create_level(13, 4))
+        renderer = Renderer()
+        render(renderer, game)
+        drawn = renderer.cells_drawn
+        for _ in range(3):
+            render(renderer, game)
+        self.assertEqual(drawn, renderer.cells_drawn)
+
+    def test_new_map_rebuilds_the_layer(self):
+        renderer = Renderer()
+        render(renderer, Game(seed=1).start(create_level(13, 4)))
+        game = Game(seed=1).start(create_level(13, 5))
+        self.assertEqual(render(Renderer(), game), render(renderer, game))
+
+    def test_frames_blend_from_the_previous_step(self):
+        game = Game(seed=1).start(create_level(13, 4))
+        renderer = Renderer()
+        previous = current = renderer.moving_sprites(game)
+        # Step until something moves, not merely spawns.
+        while len(previous) != len(current) or previous == current:
+            renderer.capture(game)
+            previous = renderer.moving_sprites(game)
+            game.update(Direction.Up)
+            current = renderer.moving_sprites(game)
+
+        self.assertEqual(previous, renderer.moving_sprites(game, 0.0))
+        halfway = renderer.moving_sprites(game, 0.5)
+        for start, middle, end in zip(previous, halfway, current):
+            self.assertTrue(min(start[1], end[1]) <= middle[1]
+                            <= max(start[1], end[1]))
+            self.assertTrue(min(start[2], end[2]) <= middle[2]
+                            <= max(start[2], end[2]))
+
+        self.assertTrue(renderer.changed(game, 1.0))
+        render(renderer, game)
+        self.assertFalse(renderer.changed(game, 1.0))
+        renderer.capture(game)
+        self.assertFalse(renderer.changed(game, 0.5))
+
+    def test_camera_stays_inside_the_map(self):
+        camera = Camera(650, 650)
+        camera.follow(100, 100, 5000)
+        self.assertEqual((0, 0), (camera.x, camera.y))
+        camera.follow(4990, 2000, 5000)
+        self.assertEqual((4350, 1675), (camera.x, camera.y))
+        self.assertEqual((87, 33, 100, 47), camera.window(50, 100))
+        self.assertTrue(camera.sees(4340, 1700, 50))
+        self.assertFalse(camera.sees(4300, 1700, 50))
+
+    def test_scrolling_view_matches_a_full_redraw(self):
+        game = Game(size=40, seed=1).start(create_level(40, 2))
+        renderer = Renderer()
+        for _ in range(400):
+            game.update(Direction.Up, True)
+            render(renderer, game)
+        self.assertLess(renderer.camera.y, 35 * 50 - 650)
+        self.assertEqual((renderer.camera.window(50, 40)), renderer._window)
+        self.assertEqual(render(Renderer(), game), render(renderer, game))
+
+    def test_booms_and_shots_become_particles(self):
+        game = Game(seed=1).start(create_level(13, 4))
+        renderer = Renderer()
+        render(renderer, game)
+        wall = game.map.get_objects(Wall)[0]
+        game.booms.append(Boom(wall.location, BoomType.Wall))
+        game.clock.advance()
+        self.assertTrue(renderer.changed(game))
+        self.assertEqual(1, len(renderer.particles))
+        render(renderer, game)
+        self.assertFalse(renderer.changed(game))
+
+        game.player.direction = Direction.Up
+        renderer.capture(game)
+        game.update(fire=True)
+        self.assertTrue(game.player.bullets)
+        render(renderer, game)
+        self.assertEqual(["boom_wall", "boom_1"],
+                         [sprite[0] for sprite in renderer._painted_particles])
+
+        for _ in range(20):
+            renderer.capture(game)
+            game.update()
+        self.assertEqual(render(Renderer(), game), render(renderer, game))
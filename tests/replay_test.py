@@ -0,0 +1,75 @@
+import unittest
+from application.game import Game, GameStatus
+from application.level import create_level
+from application.policy import HunterPolicy, RandomPolicy
+from application.replay import (
+    Replay, ReplayRecorder, ReplayDivergence,
+    STATE, play, state_hash)
+
+
+def recorded_game(seeds, policy, ticks, step=True):
+    game = Game(seed=seeds[0])
+    levels = [create_level(game.size, seed) for seed in seeds]
+    game.levels_count = len(levels)
+    game.start(levels[0])
+    recorder = ReplayRecorder(game, seeds)
+    game.observers.append(recorder)
+
+    while game.clock.ticks < ticks:
+        if game.status == GameStatus.NextLevel:
+            game.start(levels[game.level_num - 1])
+        elif game.status != GameStatus.Process:
+            break
+        if step:
+            game.step(*policy(game))
+        else:
+            if game.clock.ticks % 700 == 0:
+                game.player.cheat = (game.player.cheat + 1) % 3
+            game.update(*policy(game))
+    return game, recorder.finish()
+
+
+class ReplayTests(unittest.TestCase):
+    def test_headless_replay_matches_recording(self):
+        game, replay = recorded_game([3, 8], HunterPolicy(), 20000)
+        loaded = Replay.loads(replay.dumps())
+        self.assertEqual(replay.records, loaded.records)
+        self.assertEqual([3, 8], loaded.seeds)
+
+        replayed = play(loaded)
+        self.assertEqual(state_hash(game), state_hash(replayed))
+
+    def test_tick_by_tick_replay_with_cheats(self):
+        game, replay = recorded_game(
+            [5], RandomPolicy(2), 3000, step=False)
+        replayed = play(Replay.loads(replay.dumps()))
+        self.assertEqual(state_hash(game), state_hash(replayed))
+
+    def test_divergence_is_reported(self):
+        _, replay = recorded_game([4], HunterPolicy(), 2000)
+        index = [i for i, (kind, _, _) in enumerate(replay.records)
+                 if kind == STATE][5]
+        kind, tick, value = replay.records[index]
+        replay.records[index] = (kind, tick, value ^ 1)
+
+        with self.assertRaises(ReplayDivergence) as context:
+            play(replay)
+        self.assertEqual(tick, context.exception.tick)
+
+    def test_games_do_not_share_randomness(self):
+        def start():
+            game = Game(seed=6)
+            game.start(create_level(game.size, 6))
+            return game
+
+        alone = start()
+        for _ in range(300):
+            alone.step()
+
+        first, second = start(), start()
+        for _ in range(300):
+            first.step()
+            second.step()
+            create_level(13, 99)
+        self.assertEqual(state_hash(alone), state_hash(first))
+        self.assertEqual(state_hash(alone), state_hash(second))
@@ -0,0 +1,63 @@
+import unittest
+from application.game import Game
+from application.level import create_level
+from application.policy import HunterPolicy
+from application.rewind import RewindBuffer
+from application.save import dump
+
+
+class RewindTests(unittest.TestCase):
+    def play(self, buffer, ticks):
+        game = Game()
+        game.start(create_level(game.size, 4))
+        game.observers.append(buffer)
+        player = HunterPolicy()
+        snapshots = dict()
+        for _ in range(ticks):
+            game.update(*player(game))
+            snapshots[game.clock.ticks] = dump(game)
+        return game, snapshots
+
+    def test_restore_matches_recorded_state(self):
+        buffer = RewindBuffer(seconds=10, keyframe_interval=30)
+        game, snapshots = self.play(buffer, 1000)
+
+        restored = buffer.restore(2.5)
+        self.assertEqual(snapshots[game.clock.ticks - 250], dump(restored))
+
+        restored = buffer.restore(0.42)
+        self.assertEqual(snapshots[game.clock.ticks - 292], dump(restored))
+
+    def test_history_is_bounded_by_time(self):
+        buffer = RewindBuffer(seconds=2, keyframe_interval=50)
+        self.play(buffer, 1000)
+        self.assertTrue(2 <= buffer.available() < 2.5)
+        self.assertTrue(len(buffer) <= 250)
+
+    def test_history_is_bounded_by_bytes(self):
+        # Below the size of one 100-frame segment, so keyframes have to
+        # start early.
+        buffer = RewindBuffer(seconds=10, max_bytes=8000)
+        game = Game()
+        game.start(create_level(game.size, 4))
+        player = HunterPolicy()
+        snapshots = dict()
+        for _ in range(1000):
+            game.update(*player(game))
+            buffer.record(game)
+            snapshots[game.clock.ticks] = dump(game)
+            self.assertTrue(buffer.bytes <= 8000)
+            frames = [data for segment in buffer._segments
+                      for _, data in segment]
+            self.assertEqual(sum(map(len, frames)), buffer.bytes)
+        self.assertTrue(len(buffer) < 100)
+        self.assertTrue(0 < buffer.available() < 10)
+
+        restored = buffer.restore(0.2)
+        self.assertEqual(snapshots[game.clock.ticks - 20], dump(restored))
+
+    def test_restore_stops_tracking_the_old_map(self):
+        buffer = RewindBuffer()
+        game, _ = self.play(buffer, 50)
+        buffer.restore(0.1)
+        self.assertEqual([], game.map._trackers)
@@ -0,0 +1,81 @@
+import unittest
+import tempfile
+from application.game import Game
+from application.level import create_level
+from application.policy import HunterPolicy
+from application.save import dump, load, SaveSlots, SaveError
+
+
+def played_game(seed, steps=300):
+    game = Game()
+    game.start(create_level(game.size, seed))
+    player = HunterPolicy()
+    for _ in range(steps):
+        game.step(*player(game))
+    return game
+
+
+class SaveTests(unittest.TestCase):
+    def test_snapshot_round_trip(self):
+        game = played_game(4)
+        data = dump(game)
+        restored = load(data)
+
+        self.assertEqual(data, dump(restored))
+        self.assertEqual(game.player.location, restored.player.location)
+        self.assertEqual(len(game.map.get_enemies()),
+                         len(restored.map.get_enemies()))
+        self.assertEqual(game.clock.now(), restored.clock.now())
+
+    def test_loaded_game_continues_identically(self):
+        data = dump(played_game(4))
+        results = list()
+        for _ in range(2):
+            game = load(data)
+            player = HunterPolicy()
+            for _ in range(300):
+                game.step(*player(game))
+            results.append(dump(game))
+        self.assertEqual(results[0], results[1])
+
+    def test_rejects_foreign_data(self):
+        with self.assertRaises(SaveError):
+            load(b"PK\x03\x04" + bytes(100))
+
+    def test_rejects_damaged_data(self):
+        data = dump(played_game(3, steps=20))
+        with self.assertRaises(SaveError):
+            load(data[:len(data) // 2])
+
+    def test_slots_are_written_in_background(self):
+        game = played_game(2, steps=50)
+        with tempfile.TemporaryDirectory() as directory:
+            slots = SaveSlots(directory)
+            self.assertIsNone(slots.latest())
+            slots.save(1, game)
+            self.assertTrue(slots.exists(1))
+            self.assertEqual(1, slots.latest())
+            slots.flush()
+
+            restored = SaveSlots(directory).load(1)
+            self.assertEqual(dump(game), dump(restored))
+
+    def test_unreadable_slots_are_skipped(self):
+        game = played_game(2, steps=50)
+        with tempfile.TemporaryDirectory() as directory:
+            slots = SaveSlots(directory)
+            slots.save(0, game)
+            slots.flush()
+            data = dump(game)
+            with open(slots.path(1), "wb") as file:
+                file.write(data[:4] + bytes([1, 0]) + data[6:])
+            with open(slots.path(2), "wb") as file:
+                file.write(data[:len(data) // 2])
+
+            slots = SaveSlots(directory)
+            self.assertEqual([0, 2], sorted(slots.saved()))
+            self.assertEqual(data, dump(slots.load_latest()))
+            with open(slots.path(0), "wb") as file:
+                file.write(b"")
+            self.assertEqual([2], slots.saved())
+            self.assertIsNone(slots.load_latest())
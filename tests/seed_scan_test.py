@@ -0,0 +1,28 @@
+import unittest
+from application.level import CellState, Level
+from application.seed_scan import level_metrics, connect, scan, pick
+
+
+class SeedScanTests(unittest.TestCase):
+    def test_metrics_of_a_bare_level(self):
+        level = Level(13, 1)
+        metrics = level_metrics(level)
+        # One brick in front of the flag, then eleven open rows.
+        self.assertEqual(3 + 11, metrics["path_min"])
+        self.assertEqual(1, metrics["corridors"])
+        self.assertAlmostEqual(5 / 42, metrics["wall_density"], places=4)
+
+        level.cells[9 * 13 + 6] = CellState.ConcreteWall.value
+        self.assertEqual(2, level_metrics(level)["corridors"])
+
+    def test_scan_stores_seeds_for_picking(self):
+        connection = connect(":memory:")
+        self.assertEqual(20, scan(range(1, 21), connection, batch=7))
+        rows = pick(connection, 13, 0, 1000, limit=100)
+        self.assertEqual(set(range(1, 21)), {seed for seed, _ in rows})
+        ratings = [rating for _, rating in rows]
+        self.assertEqual(sorted(ratings), ratings)
+        low, high = ratings[5], ratings[10]
+        self.assertTrue(all(low <= rating <= high for _, rating in
+                            pick(connection, 13, low, high)))
+        connection.close()
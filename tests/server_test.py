@@ -0,0 +1,236 @@
+import unittest
+import asyncio
+from application.policy import RandomPolicy
+from application.server import (
+    Session, Connection, GameServer, GameClient,
+    FRAME, CELL, MESSAGE, FULL, DELTA, ERROR, WELCOME, CREATE, INPUT,
+    SEED_COUNT, BOOM_OVERLAY, BOOM_TICKS, ProtocolError, encode_cell,
+    message, read_message)
+from application.save import BOOM_TYPES
+from domain.boom import Boom, BoomType
+from domain.infrastructure.geometry import Direction
+
+
+def apply(tiles, units, data):
+    kind = data[MESSAGE.size - 1]
+    body = data[MESSAGE.size:]
+    count = FRAME.unpack_from(body)[2]
+    offset = FRAME.size
+    if kind == FULL:
+        tiles[:] = body[offset:offset + count]
+        units[:] = body[offset + count:offset + 2 * count]
+        return
+    for _ in range(count):
+        index, tile, unit = CELL.unpack_from(body, offset)
+        tiles[index] = tile
+        units[index] = unit
+        offset += CELL.size
+
+
+class FakeTransport:
+    def __init__(self):
+        self.buffered = 0
+
+    def is_closing(self):
+        return False
+
+    def get_write_buffer_size(self):
+        return self.buffered
+
+
+class FakeWriter:
+    def __init__(self):
+        self.transport = FakeTransport()
+        self.messages = list()
+
+    def write(self, data):
+        self.messages.append(data)
+
+
+class ServerTests(unittest.TestCase):
+    def test_deltas_rebuild_the_board(self):
+        session = Session(1, [3, 4])
+        tiles, units = bytearray(), bytearray()
+        apply(tiles, units, session.full_message())
+        player = RandomPolicy(1)
+        for _ in range(1500):
+            if session.finished:
+                break
+            session.input = player(session.game)
+            delta = session.tick()
+            if delta is None:
+                delta = session.full_message()
+            if delta:
+                apply(tiles, units, delta)
+
+            expected = [encode_cell(session.game.map[location],
+                                    session.boom_stage(location))
+                        for location in sorted(
+                            session.game.map, key=lambda p: (p.y, p.x))]
+            self.assertEqual(bytes(tile for tile, _ in expected), tiles)
+            self.assertEqual(bytes(unit for _, unit in expected), units)
+
+    def test_booms_stay_on_the_board_for_a_while(self):
+        session = Session(1, [3])
+        location = session.game.player.location
+        index = location.y * session.size + location.x
+        session.game.booms.append(Boom(location))
+        session.delta_message()
+        stages = list()
+        for _ in range(BOOM_TICKS[BoomType.Small]):
+            stages.append(session.tiles[index] >> 4)
+            session.game.clock.advance()
+            session.game.booms = list()
+            session.delta_message()
+        small = BOOM_OVERLAY + BOOM_TYPES.index(BoomType.Small)
+        big = BOOM_OVERLAY + BOOM_TYPES.index(BoomType.Big)
+        self.assertEqual([small] * 16 + [big] * 16, stages)
+        self.assertEqual(0, session.tiles[index] >> 4)
+        self.assertEqual({}, session.booms)
+
+    def test_slow_client_is_resynchronised(self):
+        session = Session(1, [5])
+        writer = FakeWriter()
+        connection = Connection(writer, limit=100)
+        connection.send(session, None)
+        self.assertEqual(FULL, writer.messages[-1][MESSAGE.size - 1])
+
+        writer.transport.buffered = 1000
+        session.input = (Direction.Left, True)
+        for _ in range(40):
+            connection.send(session, session.tick())
+        self.assertEqual(1, len(writer.messages))
+        self.assertEqual(40, connection.dropped)
+
+        writer.transport.buffered = 0
+        connection.send(session, session.tick())
+        self.assertEqual(FULL, writer.messages[-1][MESSAGE.size - 1])
+        sent = len(writer.messages)
+        while len(writer.messages) == sent:
+            connection.send(session, session.tick())
+        self.assertEqual(DELTA, writer.messages[-1][MESSAGE.size - 1])
+
+    def test_player_and_watcher_over_tcp(self):
+        async def play():
+            server = await GameServer(tick=0.001).start()
+            player = await GameClient.connect(port=server.port)
+            session = await player.create([5])
+            watcher = await GameClient.connect(port=server.port)
+            await watcher.watch(session)
+
+            player.send_input(Direction.Left, True)
+            kinds = [await player.receive() for _ in range(20)]
+            while watcher.tick < player.tick:
+                await watcher.receive()
+
+            result = (kinds, player.tick, watcher.tick,
+                      player.tiles == watcher.tiles,
+                      player.units == watcher.units)
+            await player.close()
+            await watcher.close()
+            await server.close()
+            return result
+
+        kinds, tick, watched, tiles, units = asyncio.run(play())
+        self.assertEqual({DELTA}, set(kinds))
+        self.assertEqual(tick, watched)
+        self.assertTrue(tiles and units)
+
+    def test_malformed_messages_get_an_error(self):
+        async def send(server, replies, *frames):
+            reader, writer = await asyncio.open_connection(
+                "127.0.0.1", server.port)
+            for frame in frames:
+                writer.write(frame)
+            kinds = list()
+            try:
+                for _ in range(replies + 1):
+                    kind, body = await asyncio.wait_for(
+                        read_message(reader), 1)
+                    kinds.append(kind)
+            except (asyncio.IncompleteReadError, asyncio.TimeoutError):
+                pass
+            writer.close()
+            return kinds
+
+        async def run():
+            server = await GameServer(tick=0.001, max_sessions=1).start()
+            results = [
+                await send(server, 1, MESSAGE.pack(0, CREATE)),
+                await send(server, 1, MESSAGE.pack(1 << 30, CREATE)),
+                await send(server, 6, message(CREATE),
+                           message(CREATE, SEED_COUNT.pack(3) + b"\0"),
+                           message(INPUT, bytes([6])),
+                           message(99),
+                           message(CREATE, SEED_COUNT.pack(1) + bytes(8)))]
+            # The last session went away with its only client.
+            await asyncio.sleep(0.05)
+            holder = await GameClient.connect(port=server.port)
+            await holder.create([5])
+            full = await send(
+                server, 1, message(CREATE, SEED_COUNT.pack(1) + bytes(8)))
+            sessions = [len(server.sessions)]
+            await holder.close()
+            await asyncio.sleep(0.05)
+            sessions.append(len(server.sessions))
+            await server.close()
+            return results, full, sessions
+
+        results, full, sessions = asyncio.run(run())
+        # A bad length closes the connection, a bad body only fails
+        # that request.
+        self.assertEqual([[ERROR], [ERROR]], results[:2])
+        self.assertEqual([ERROR] * 4 + [WELCOME, FULL], results[2][:6])
+        self.assertEqual([ERROR], full)
+        self.assertEqual([1, 0], sessions)
+
+    def test_every_direction_is_accepted(self):
+        async def play():
+            server = await GameServer(tick=0.001).start()
+            client = await GameClient.connect(port=server.port)
+            session = server.sessions[await client.create([5])]
+            inputs = list()
+            for direction in [Direction.Up, Direction.Down,
+                              Direction.Left, Direction.Right, None]:
+                client.send_input(direction, True)
+                for _ in range(3):
+                    await client.receive()
+                inputs.append(session.input)
+
+            # A refused request reaches the client as an error.
+            client.writer.write(message(INPUT, bytes([7])))
+            with self.assertRaises(ProtocolError):
+                for _ in range(50):
+                    await client.receive()
+            await client.close()
+            await server.close()
+            return inputs
+
+        inputs = asyncio.run(play())
+        self.assertEqual([(Direction.Up, True), (Direction.Down, True),
+                          (Direction.Left, True), (Direction.Right, True),
+                          (None, True)], inputs)
+
+    def test_connection_leaves_its_old_session(self):
+        async def run():
+            server = await GameServer(tick=0.001, max_sessions=1).start()
+            reader, writer = await asyncio.open_connection(
+                "127.0.0.1", server.port)
+            create = message(CREATE, SEED_COUNT.pack(1) + bytes(8))
+            kinds = list()
+            for _ in range(5):
+                writer.write(create)
+                kind, _ = await read_message(reader)
+                while kind not in [WELCOME, ERROR]:
+                    kind, _ = await read_message(reader)
+                kinds.append(kind)
+            sessions = [len(server.sessions)]
+            writer.close()
+            await asyncio.sleep(0.05)
+            sessions.append(len(server.sessions))
+            await server.close()
+            return kinds, sessions
+
+        kinds, sessions = asyncio.run(run())
+        self.assertEqual([WELCOME] * 5, kinds)
+        self.assertEqual([1, 0], sessions)
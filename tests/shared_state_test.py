@@ -0,0 +1,56 @@
+import unittest
+from application.game import Game
+from application.level import create_level
+from application.shared_state import (
+    StateWriter, StateReader, PLAYER, FLAG, BRICK)
+
+
+class SharedStateTests(unittest.TestCase):
+    def setUp(self):
+        self.game = Game()
+        self.game.start(create_level(self.game.size, 3))
+        self.writer = StateWriter(self.game.size, capacity=64)
+        self.game.observers.append(self.writer)
+        self.reader = StateReader(self.writer.name)
+
+    def tearDown(self):
+        self.reader.close()
+        self.writer.close()
+
+    def test_reader_sees_published_frame(self):
+        for _ in range(10):
+            self.game.step(fire=True)
+        frame = self.reader.read()
+
+        self.assertEqual(0, frame.sequence % 2)
+        self.assertTrue(frame.sequence > 0)
+        self.assertEqual(self.game.clock.ticks, frame.tick)
+        self.assertEqual(self.reader.size, self.game.size)
+
+        player = self.game.player
+        rows = frame.get_entities()
+        players = rows[rows["kind"] == PLAYER]
+        self.assertEqual(1, len(players))
+        self.assertEqual((player.location.x, player.location.y),
+                         (players[0]["x"], players[0]["y"]))
+
+        flag = self.game.map.get_flag()
+        self.assertEqual(FLAG, frame.terrain[flag.location.y,
+                                             flag.location.x])
+        self.assertTrue((frame.terrain == BRICK).any())
+
+    def test_sequence_advances_every_publish(self):
+        sequence = self.reader.sequence
+        self.writer.publish(self.game)
+        self.assertEqual(sequence + 2, self.reader.sequence)
+        self.assertTrue(self.reader.is_consistent(self.reader.sequence))
+        self.assertFalse(self.reader.wait(self.reader.sequence, timeout=0))
+
+    def test_read_gives_up_on_a_torn_frame(self):
+        self.writer.publish(self.game)
+        layout = self.writer._layout
+        # A writer that died mid-publish leaves the sequence odd.
+        layout.seq[0] += 1
+        self.assertIsNone(self.reader.read(timeout=0.01))
+        layout.seq[0] += 1
+        self.assertIsNotNone(self.reader.read(timeout=0.01))
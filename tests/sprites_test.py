@@ -0,0 +1,56 @@
+import unittest
+import os
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+from PyQt5.QtWidgets import QApplication
+from PyQt5.QtGui import QImage, QPainter
+from PyQt5.QtCore import QRect, Qt
+from application.sprites import IMAGES, SpriteAtlas, load_atlas
+
+APP = QApplication.instance() or QApplication([])
+
+
+class SpriteAtlasTests(unittest.TestCase):
+    def test_sprites_do_not_overlap(self):
+        atlas = load_atlas(50)
+        self.assertIs(atlas, load_atlas(50))
+        self.assertEqual(10, atlas.rects["bullet_up"].width())
+        self.assertEqual(30, atlas.rects["heart"].width())
+        rects = list(atlas.rects.values())
+        for i, rect in enumerate(rects):
+            self.assertTrue(atlas.pixmap.rect().contains(rect))
+            for other in rects[i + 1:]:
+                self.assertFalse(rect.intersects(other))
+
+    def test_blit_matches_scaled_image(self):
+        atlas = SpriteAtlas(40)
+        expected = QImage(40, 40, QImage.Format_ARGB32)
+        actual = QImage(40, 40, QImage.Format_ARGB32)
+        for image in [expected, actual]:
+            image.fill(Qt.black)
+
+        painter = QPainter(expected)
+        painter.drawImage(QRect(0, 0, 40, 40),
+                          QImage(os.path.join(IMAGES, "tank_up.png")))
+        painter.end()
+        painter = QPainter(actual)
+        atlas.draw(painter, "tank_up", 0, 0)
+        painter.end()
+        self.assertEqual(expected, actual)
+
+    def test_batch_matches_single_draws(self):
+        atlas = load_atlas(65)
+        sprites = [("tank_up", 3, 7), ("bullet_left", 70, 41),
+                   ("brick_wall", 65, 65), ("heart", 0, 100)]
+        expected = QImage(200, 200, QImage.Format_ARGB32)
+        actual = QImage(200, 200, QImage.Format_ARGB32)
+        for image in [expected, actual]:
+            image.fill(Qt.black)
+
+        painter = QPainter(expected)
+        for name, x, y in sprites:
+            atlas.draw(painter, name, x, y)
+        painter.end()
+        painter = QPainter(actual)
+        atlas.draw_batch(painter, sprites)
+        painter.end()
+        self.assertEqual(expected, actual)
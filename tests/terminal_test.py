@@ -0,0 +1,61 @@
+import unittest
+import curses
+from application.server import Session
+from application.terminal import TerminalView, Keyboard, glyph
+from domain.infrastructure.geometry import Direction
+
+
+class FakeScreen:
+    def __init__(self):
+        self.cells = dict()
+        self.writes = 0
+
+    def addstr(self, y, x, text, attr=0):
+        self.cells[y, x] = text
+        self.writes += 1
+
+    def clrtoeol(self):
+        pass
+
+    def erase(self):
+        self.cells.clear()
+
+    def refresh(self):
+        pass
+
+    def getch(self):
+        return -1
+
+
+class TerminalTests(unittest.TestCase):
+    def test_view_redraws_only_changed_cells(self):
+        session = Session(0, [5])
+        screen = FakeScreen()
+        view = TerminalView(screen, colors={})
+        view.render(session.size, session.tiles, session.units,
+                    None, "status")
+        self.assertEqual(13 * 13 + 1, screen.writes)
+
+        player = session.game.player.location
+        self.assertEqual("@^", screen.cells[player.y + 1, player.x * 2])
+
+        session.input = (Direction.Left, False)
+        for _ in range(16):
+            session.tick()
+            screen.writes = 0
+            view.render(session.size, session.tiles, session.units,
+                        session.changed, "status")
+            self.assertEqual(len(session.changed), screen.writes)
+        self.assertEqual("@<", screen.cells[player.y + 1, player.x * 2])
+
+    def test_grass_hides_units(self):
+        self.assertEqual('""', glyph(3, 1)[0])
+        self.assertEqual("  ", glyph(0, 0)[0])
+
+    def test_keys_are_held_for_a_while(self):
+        keyboard = Keyboard(FakeScreen(), hold=2)
+        keyboard.press(curses.KEY_UP)
+        keyboard.press(ord(" "))
+        self.assertEqual((Direction.Up, True), keyboard.input())
+        self.assertEqual((Direction.Up, True), keyboard.input())
+        self.assertEqual((None, False), keyboard.input())